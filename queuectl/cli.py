@@ -1,30 +1,67 @@
 """CLI interface using Click"""
 
+import contextlib
+import io
 import json
 import os
+import shlex
 import signal
-import time
+import sys
+from operator import itemgetter
 from pathlib import Path
-from typing import Optional, Any
-from datetime import datetime, timedelta
+from typing import IO, Optional, Any, Callable, Dict, List
+from datetime import datetime
 
 import click
 
 from queuectl.config import Config
 from queuectl.models import JobState
-from queuectl.queue import QueueManager
-from queuectl.worker import WorkerPool
+from queuectl.utils import json_dumps, json_loads, local_to_utc
 from queuectl.exceptions import (
     JobNotFoundException, 
     InvalidJobStateException,
     QueueCTLException
 )
 
+# Fields shown per event in `metrics`, fetched in one C-level call
+_EVENT_FIELDS = itemgetter('timestamp', 'job_id', 'event_type')
+
+# Value parsers for typed `config set` keys; anything else stays a string
+_CASTERS: Dict[str, Callable[[str], Any]] = {
+    'max_retries': int,
+    'job_timeout': int,
+    'metrics_retention_days': int,
+    'backoff_base': float,
+    'worker_poll_interval': float,
+}
+
+# Printed with the exit code after each command's output in `batch`
+# and `config script`
+_BATCH_END = "---END---"
+
+# Read-only invocations `self-check` runs to confirm the CLI works end to end
+_SELF_CHECKS = (
+    ['--help'],
+    ['status'],
+    ['list'],
+    ['config', 'get'],
+    ['dlq', 'list'],
+)
+
 
 @click.group()
-def cli() -> None:
+@click.option('--output', type=click.Choice(['text', 'json']), default='text',
+              help='Output format for status, list, dlq list and config get')
+@click.pass_context
+def cli(ctx: click.Context, output: str) -> None:
     """QueueCTL - Background Job Queue System"""
-    pass
+    ctx.ensure_object(dict)['fmt'] = output
+
+
+def _json_output() -> bool:
+    """Whether the global --output json option was given"""
+    obj = click.get_current_context().find_root().obj
+    return bool(obj) and obj.get('fmt') == 'json'
 
 
 @cli.command()
@@ -38,27 +75,21 @@ def enqueue(job_json: str) -> None:
     Example: queuectl enqueue '{"id":"job3","command":"backup.sh","run_at":"2025-11-11T10:00:00"}'
     """
     try:
-        from datetime import datetime
-        
-        data = json.loads(job_json)
+        data = json_loads(job_json)
         
         if 'id' not in data or 'command' not in data:
             click.echo("Error: job must contain 'id' and 'command' fields", err=True)
             return
         
-        config = Config.load()
-        manager = QueueManager(config)
+        from queuectl.queue import get_manager
+        manager = get_manager(Config.load().db_path)
         
         # Parse optional run_at datetime (accepts local time, converts to UTC)
         run_at = None
         local_time_str = None
         if 'run_at' in data:
-            local_dt = datetime.fromisoformat(data['run_at'])
             local_time_str = data['run_at']  # Keep original for display
-            # Convert local time to UTC for storage
-            utc_offset_seconds = -time.timezone if time.daylight == 0 else -time.altzone
-            utc_offset = timedelta(seconds=utc_offset_seconds)
-            run_at = local_dt - utc_offset
+            run_at = local_to_utc(datetime.fromisoformat(data['run_at']))
         
         job = manager.enqueue(
             data['id'],
@@ -92,22 +123,29 @@ def list(state: Optional[str]) -> None:
     Example: queuectl list --state pending
     """
     try:
-        config = Config.load()
-        manager = QueueManager(config)
+        from queuectl.queue import get_manager
+        manager = get_manager(Config.load().db_path)
         
         state_enum = JobState(state) if state else None
         jobs = manager.list_jobs(state_enum)
         
+        if _json_output():
+            click.echo(json_dumps([job.to_dict() for job in jobs]))
+            return
+        
         if not jobs:
             click.echo("No jobs found")
             return
         
+        # Build output once and write it in a single call
+        lines = []
         for job in jobs:
-            click.echo(f"[{job.id}] {job.command}")
-            click.echo(f"  State: {job.state.value} | Attempts: {job.attempts}/{job.max_retries}")
+            lines.append(f"[{job.id}] {job.command}\n"
+                         f"  State: {job.state.value} | Attempts: {job.attempts}/{job.max_retries}")
             if job.error_message:
-                click.echo(f"  Error: {job.error_message}")
-            click.echo()
+                lines.append(f"  Error: {job.error_message}")
+            lines.append("")
+        click.echo("\n".join(lines))
     
     except Exception as e:
         click.echo(f"Error: {e}", err=True)
@@ -121,10 +159,14 @@ def status() -> None:
     Example: queuectl status
     """
     try:
-        config = Config.load()
-        manager = QueueManager(config)
+        from queuectl.queue import get_manager
+        manager = get_manager(Config.load().db_path)
         stats = manager.get_stats()
         
+        if _json_output():
+            click.echo(json_dumps(stats))
+            return
+        
         click.echo("=== Queue Status ===")
         click.echo(f"Pending:    {stats['pending']}")
         click.echo(f"Processing: {stats['processing']}")
@@ -146,8 +188,8 @@ def metrics(recent: int) -> None:
     Example: queuectl metrics --recent 20
     """
     try:
-        config = Config.load()
-        manager = QueueManager(config)
+        from queuectl.queue import get_manager
+        manager = get_manager(Config.load().db_path)
         metrics_data = manager.get_metrics()
         
         click.echo("=== Job Metrics ===")
@@ -160,15 +202,15 @@ def metrics(recent: int) -> None:
         
         recent_events = metrics_data.get('recent_events', [])[:recent]
         if recent_events:
-            click.echo(f"\nRecent Events (last {len(recent_events)}):")
+            lines = [f"\nRecent Events (last {len(recent_events)}):"]
             for event in recent_events:
-                timestamp = event['timestamp'].split('T')[1][:8]  # Show time only
-                job_id = event['job_id'][:20]  # Truncate long IDs
-                event_type = event['event_type']
-                click.echo(f"  [{timestamp}] {job_id:20} - {event_type}")
-                if event.get('error_message'):
-                    error = event['error_message'][:60]
-                    click.echo(f"            Error: {error}")
+                timestamp, job_id, event_type = _EVENT_FIELDS(event)
+                # Show time only (HH:MM:SS of ISO8601); ':20.20' pads and truncates long IDs
+                lines.append(f"  [{timestamp[11:19]}] {job_id:20.20} - {event_type}")
+                error = event.get('error_message')
+                if error:
+                    lines.append(f"            Error: {error[:60]}")
+            click.echo("\n".join(lines))
     
     except Exception as e:
         click.echo(f"Error: {e}", err=True)
@@ -189,6 +231,10 @@ def start(count: int) -> None:
     Example: queuectl worker start --count 3
     """
     try:
+        # Imported lazily: multiprocessing/subprocess are only needed here
+        from queuectl.queue import QueueManager
+        from queuectl.worker import WorkerPool
+        
         config = Config.load()
         manager = QueueManager(config)
         pool = WorkerPool(manager, config, count)
@@ -216,8 +262,7 @@ def stop() -> None:
             click.echo("No workers running")
             return
         
-        with open(pid_file) as f:
-            pids = [int(line.strip()) for line in f if line.strip()]
+        pids = [int(pid) for pid in pid_file.read_text().split()]
         
         for pid in pids:
             try:
@@ -242,8 +287,8 @@ def health() -> None:
     Example: queuectl worker health
     """
     try:
-        config = Config.load()
-        manager = QueueManager(config=config)
+        from queuectl.queue import get_manager
+        manager = get_manager(Config.load().db_path)
         stats = manager.get_stats()
         
         click.echo("=== Worker Status ===")
@@ -268,22 +313,25 @@ def dlq_list() -> None:
     Example: queuectl dlq list
     """
     try:
-        config = Config.load()
-        manager = QueueManager(config)
+        from queuectl.queue import get_manager
+        manager = get_manager(Config.load().db_path)
         
         jobs = manager.list_jobs(JobState.DEAD)
         
+        if _json_output():
+            click.echo(json_dumps([job.to_dict() for job in jobs]))
+            return
+        
         if not jobs:
             click.echo("DLQ is empty")
             return
         
-        click.echo(f"=== Dead Letter Queue ({len(jobs)} jobs) ===\n")
-        
+        lines = [f"=== Dead Letter Queue ({len(jobs)} jobs) ===\n"]
         for job in jobs:
-            click.echo(f"[{job.id}] {job.command}")
-            click.echo(f"  Attempts: {job.attempts}/{job.max_retries}")
-            click.echo(f"  Error: {job.error_message}")
-            click.echo()
+            lines.append(f"[{job.id}] {job.command}\n"
+                         f"  Attempts: {job.attempts}/{job.max_retries}\n"
+                         f"  Error: {job.error_message}\n")
+        click.echo("\n".join(lines))
     
     except Exception as e:
         click.echo(f"Error: {e}", err=True)
@@ -298,8 +346,8 @@ def dlq_retry(job_id: str) -> None:
     Example: queuectl dlq retry job1
     """
     try:
-        config = Config.load()
-        manager = QueueManager(config)
+        from queuectl.queue import get_manager
+        manager = get_manager(Config.load().db_path)
         
         manager.retry_dlq_job(job_id)
         click.echo(f"Job {job_id} reset to pending")
@@ -334,12 +382,16 @@ def config_get(key: Optional[str]) -> None:
         if key:
             # Convert hyphen to underscore
             key = key.replace('-', '_')
-            value = cfg.get(key)
-            click.echo(f"{key.replace('_', '-')} = {value}")
+            data = {key: cfg.get(key)}
         else:
             # Show all config
-            from dataclasses import asdict
-            data = asdict(cfg)
+            data = cfg.to_dict()
+        
+        if _json_output():
+            click.echo(json_dumps({k.replace('_', '-'): v for k, v in data.items()}))
+        elif key:
+            click.echo(f"{key.replace('_', '-')} = {data[key]}")
+        else:
             for k, v in data.items():
                 click.echo(f"{k.replace('_', '-')}: {v}")
     
@@ -364,15 +416,12 @@ def config_set(key: str, value: str) -> None:
         key = key.replace('-', '_')
         
         # Type conversion
-        value_typed: Any
-        if key in ['max_retries', 'job_timeout']:
-            value_typed = int(value)
-        elif key in ['backoff_base', 'worker_poll_interval']:
-            value_typed = float(value)
-        else:
-            value_typed = value
+        value_typed: Any = _CASTERS.get(key, str)(value)
         
         cfg.set(key, value_typed)
+        
+        from queuectl.queue import get_manager
+        get_manager.cache_clear()  # Cached manager holds the old config
         click.echo(f"Set {key.replace('_', '-')} = {value_typed}")
     
     except ValueError as e:
@@ -380,6 +429,101 @@ def config_set(key: str, value: str) -> None:
     except Exception as e:
         click.echo(f"Error: {e}", err=True)
 
+
+@config.command('script')
+@click.argument('source', type=click.File('r'), default='-')
+def config_script(source: IO[str]) -> None:
+    """
+    Run newline-separated config commands from a file or stdin in one process
+    
+    Each command's output is followed by a "---END--- <exit code>" line.
+    
+    Example: printf 'set max-retries 5\nget max-retries\n' | queuectl config script -
+    """
+    _run_lines(source, ['config'])
+
+
+def _run_in_process(argv: List[str]) -> int:
+    """Dispatch one command line through the CLI group, returning its exit code"""
+    try:
+        # Without standalone mode, main returns the code given to ctx.exit()
+        result = cli.main(argv, prog_name='queuectl', standalone_mode=False)
+    except click.exceptions.Exit as e:
+        return e.exit_code
+    except click.ClickException as e:
+        e.show()
+        return e.exit_code
+    except click.Abort:
+        return 1
+    except SystemExit as e:
+        # A command calling sys.exit() must not end the surrounding loop
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        click.echo(e.code, err=True)
+        return 1
+    return result if isinstance(result, int) else 0
+
+
+def _run_lines(stream: IO[str], prefix: Optional[List[str]] = None) -> None:
+    """Run each line of stream as a command under prefix, marking where each ends"""
+    # readline rather than iteration, so each line runs as soon as it arrives
+    for line in iter(stream.readline, ''):
+        try:
+            argv = shlex.split(line)
+        except ValueError as e:
+            click.echo(f"Error: {e}", err=True)
+            click.echo(f"{_BATCH_END} 2")
+        else:
+            if not argv:
+                continue
+            click.echo(f"{_BATCH_END} {_run_in_process((prefix or []) + argv)}")
+        sys.stdout.flush()
+
+
+@cli.command('self-check')
+def self_check() -> None:
+    """
+    Run each read-only command in-process and report whether it worked
+    
+    Prints "<command>=OK" or "<command>=FAIL:<reason>" per command; a command
+    fails on a non-zero exit code or any output on stderr.
+    
+    Example: queuectl self-check
+    """
+    results: Dict[str, str] = {}
+    for argv in _SELF_CHECKS:
+        out, err = io.StringIO(), io.StringIO()
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+            code = _run_in_process(argv)
+        stderr = err.getvalue().strip()
+        if code == 0 and not stderr:
+            results[' '.join(argv)] = "OK"
+        else:
+            # The last stderr line is the "Error: ..." message
+            results[' '.join(argv)] = f"FAIL:{stderr.splitlines()[-1] if stderr else f'exit code {code}'}"
+    
+    if _json_output():
+        click.echo(json_dumps(results))
+    else:
+        click.echo("\n".join(f"{name}={result}" for name, result in results.items()))
+    if any(result != "OK" for result in results.values()):
+        # ctx.exit rather than sys.exit, so batch reports it and carries on
+        click.get_current_context().exit(1)
+
+
+@cli.command()
+def batch() -> None:
+    """
+    Run newline-separated commands from stdin in one process
+    
+    Each command's output is followed by a "---END--- <exit code>" line,
+    flushed at once, so batch can also be driven as an interactive coprocess.
+    
+    Example: printf 'status\ndlq list\n' | queuectl batch
+    """
+    _run_lines(sys.stdin)
+
+
 @cli.command()
 @click.option('--host', default='127.0.0.1', help='Host to bind to')
 @click.option('--port', default=5000, help='Port to bind to')
@@ -1,9 +1,13 @@
 """Configuration management"""
 
-import json
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, fields
 from pathlib import Path
-from typing import Any
+from typing import Any, Dict, Tuple
+
+from queuectl.utils.serialization import json_loads, json_dumps
+
+# Parsed config file contents keyed by path, invalidated on mtime change
+_CACHE: Dict[Path, Tuple[int, Dict[str, Any]]] = {}
 
 
 @dataclass
@@ -14,26 +18,46 @@ class Config:
     db_path: str = str(Path.home() / ".queuectl" / "queue.db")
     worker_poll_interval: float = 1.0
     job_timeout: int = 300
+    metrics_retention_days: int = 30
 
     CONFIG_FILE = Path.home() / ".queuectl" / "config.json"
 
     @classmethod
     def load(cls) -> 'Config':
         """Load configuration from file or return defaults"""
-        if cls.CONFIG_FILE.exists():
-            try:
-                with open(cls.CONFIG_FILE, 'r') as f:
-                    data = json.load(f)
-                    return cls(**data)
-            except Exception:
-                return cls()
-        return cls()
+        try:
+            mtime_ns = cls.CONFIG_FILE.stat().st_mtime_ns
+        except OSError:
+            return cls()
+
+        cached = _CACHE.get(cls.CONFIG_FILE)
+        if cached and cached[0] == mtime_ns:
+            return cls(**cached[1])
+
+        try:
+            with open(cls.CONFIG_FILE, 'rb') as f:
+                data = json_loads(f.read())
+            config = cls(**data)
+        except Exception:
+            return cls()
+        _CACHE[cls.CONFIG_FILE] = (mtime_ns, data)
+        return config
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        """Drop all memoized config file contents"""
+        _CACHE.clear()
 
     def save(self) -> None:
         """Save configuration to file"""
+        _CACHE.pop(self.CONFIG_FILE, None)
         self.CONFIG_FILE.parent.mkdir(parents=True, exist_ok=True)
         with open(self.CONFIG_FILE, 'w') as f:
-            json.dump(asdict(self), f, indent=2)
+            f.write(json_dumps(self.to_dict(), indent=True))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return config fields as a flat dict (cheaper than dataclasses.asdict)"""
+        return {f.name: getattr(self, f.name) for f in fields(self)}
 
     def set(self, key: str, value: Any) -> None:
         """Set a configuration value and save"""
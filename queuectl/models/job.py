@@ -5,6 +5,14 @@ from datetime import datetime
 from enum import Enum
 from typing import Optional
 
+# Bound once; datetime.fromisoformat is implemented in C
+_fromisoformat = datetime.fromisoformat
+
+
+def _parse_optional_datetime(value: Optional[str]) -> Optional[datetime]:
+    """Parse an optional ISO8601 string, passing None/empty through"""
+    return _fromisoformat(value) if value else None
+
 
 class JobState(Enum):
     """Job state enumeration"""
@@ -15,9 +23,9 @@ class JobState(Enum):
     DEAD = "dead"
 
 
-@dataclass
+@dataclass(slots=True)
 class Job:
-    """Job model representing a background task"""
+    """Job model representing a background task (slotted for memory and attribute speed)"""
     id: str
     command: str
     state: JobState = JobState.PENDING
@@ -44,6 +52,10 @@ class Job:
             return True
         return datetime.utcnow() >= self.run_at
 
+    def page_token(self) -> str:
+        """Keyset cursor for iter_jobs(before=...): created_at, then id to break ties"""
+        return f"{self.created_at.isoformat()}|{self.id}"
+
     def to_dict(self) -> dict:
         """Serialize job to dictionary for storage"""
         return {
@@ -70,9 +82,9 @@ class Job:
             attempts=data['attempts'],
             max_retries=data['max_retries'],
             priority=data.get('priority', 5),
-            run_at=datetime.fromisoformat(data['run_at']) if data.get('run_at') else None,
-            created_at=datetime.fromisoformat(data['created_at']),
-            updated_at=datetime.fromisoformat(data['updated_at']),
+            run_at=_parse_optional_datetime(data.get('run_at')),
+            created_at=_fromisoformat(data['created_at']),
+            updated_at=_fromisoformat(data['updated_at']),
             error_message=data.get('error_message'),
-            last_executed_at=datetime.fromisoformat(data['last_executed_at']) if data.get('last_executed_at') else None,
+            last_executed_at=_parse_optional_datetime(data.get('last_executed_at')),
         )
@@ -1,3 +1,3 @@
-from .manager import QueueManager
+from .manager import QueueManager, get_manager
 
-__all__ = ['QueueManager']
+__all__ = ['QueueManager', 'get_manager']
@@ -1,79 +1,131 @@
 """Queue manager - facade over storage layer"""
 
+import atexit
+import dataclasses
+import functools
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Callable, Iterator
 
 from queuectl.models import Job, JobState
 from queuectl.storage import SQLiteStorage
 from queuectl.exceptions import JobNotFoundException, InvalidJobStateException
 from queuectl.config import Config
 
+# Enum values resolved once at import rather than on every call
+_S_PENDING = JobState.PENDING.value
+_S_DEAD = JobState.DEAD.value
+
 
 class QueueManager:
     """Manages job queue operations"""
 
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, notify: Optional[Callable[[], None]] = None,
+                 clock: Callable[[], datetime] = datetime.utcnow):
         self.storage = SQLiteStorage(config.db_path)
         self.config = config
+        # Called whenever a job becomes pending, e.g. to wake idle workers
+        self.notify = notify
+        # Source of the naive-UTC "now" for timestamps and run_at checks
+        self.clock = clock
+
+    def _notify(self) -> None:
+        """Signal that new pending work is available"""
+        if self.notify is not None:
+            self.notify()
 
     def enqueue(self, job_id: str, command: str, max_retries: Optional[int] = None, 
                 priority: Optional[int] = None, run_at: Optional[datetime] = None) -> Job:
         """Add new job to queue with optional priority and scheduling"""
+        now = self.clock()
         job = Job(
             id=job_id,
             command=command,
             max_retries=max_retries if max_retries is not None else self.config.max_retries,
             priority=priority if priority is not None else 5,
             run_at=run_at,
+            created_at=now,
+            updated_at=now,
         )
-        self.storage.insert_job(job)
+        self.storage.insert_job(job, now)
+        self._notify()
         return job
 
+    def enqueue_many(self, specs: List[Dict[str, Any]]) -> List[Job]:
+        """
+        Add many jobs in one transaction.
+        
+        Each spec uses the same keys as the enqueue JSON payload: 'id' and
+        'command' are required; 'max_retries', 'priority' and 'run_at'
+        (a UTC datetime) are optional.
+        """
+        now = self.clock()
+        jobs = self._jobs_from_specs(specs, now)
+        self.storage.insert_jobs(jobs, now)
+        self._notify()
+        return jobs
+
+    def _jobs_from_specs(self, specs: List[Dict[str, Any]], now: datetime) -> List[Job]:
+        """Build Job objects from enqueue specs, applying the configured defaults"""
+        return [
+            Job(
+                id=spec['id'],
+                command=spec['command'],
+                max_retries=spec['max_retries'] if spec.get('max_retries') is not None else self.config.max_retries,
+                priority=spec['priority'] if spec.get('priority') is not None else 5,
+                run_at=spec.get('run_at'),
+                created_at=now,
+                updated_at=now,
+            )
+            for spec in specs
+        ]
+
     def claim_job(self) -> Optional[Job]:
         """Atomically claim next pending job"""
-        return self.storage.claim_job()
+        return self.storage.claim_job(self.clock())
+
+    def claim_jobs(self, limit: int) -> List[Job]:
+        """Atomically claim up to limit pending jobs in one transaction"""
+        return self.storage.claim_jobs(limit, self.clock())
 
     def mark_completed(self, job_id: str, duration_ms: Optional[int] = None) -> None:
         """Mark job as completed and record metric"""
-        self.storage.update_job(job_id, {
-            'state': JobState.COMPLETED.value,
-            'updated_at': datetime.utcnow().isoformat(),
-        })
-        # Record completion metric via storage
-        with self.storage._transaction() as conn:
-            self.storage._record_metric(conn, job_id, 'completed', duration_ms=duration_ms)
+        self.storage.finalize_job(job_id, JobState.COMPLETED, self.clock(),
+                                  'completed', duration_ms=duration_ms)
 
     def mark_pending(self, job_id: str, attempts: int, error: str) -> None:
         """Return job to pending for retry"""
-        self.storage.update_job(job_id, {
-            'state': JobState.PENDING.value,
-            'attempts': attempts,
-            'error_message': error,
-            'updated_at': datetime.utcnow().isoformat(),
-        })
-        # Record failed attempt metric
-        with self.storage._transaction() as conn:
-            self.storage._record_metric(conn, job_id, 'failed', error_message=error)
+        self.storage.finalize_job(job_id, JobState.PENDING, self.clock(),
+                                  'failed', attempts=attempts, error=error)
+        self._notify()
 
     def mark_dead(self, job_id: str, attempts: int, error: str) -> None:
         """Move job to DLQ and record metric"""
-        self.storage.update_job(job_id, {
-            'state': JobState.DEAD.value,
-            'attempts': attempts,
-            'error_message': error,
-            'updated_at': datetime.utcnow().isoformat(),
-        })
-        # Record DLQ metric
-        with self.storage._transaction() as conn:
-            self.storage._record_metric(conn, job_id, 'dlq', error_message=error)
+        self.storage.finalize_job(job_id, JobState.DEAD, self.clock(),
+                                  'dlq', attempts=attempts, error=error)
+
+    def _bulk_mark_pending_completed(self, specs: Optional[List[Dict[str, Any]]] = None) -> int:
+        """
+        Complete all due pending jobs at once, returning how many (test helper).
+        
+        Jobs given as enqueue specs are added first, in the same transaction.
+        """
+        now = self.clock()
+        new_jobs = self._jobs_from_specs(specs, now) if specs else None
+        return self.storage._complete_due_pending(now, new_jobs)
 
     def get_stats(self) -> Dict[str, int]:
         """Return counts by state"""
         return self.storage.get_job_counts()
 
-    def list_jobs(self, state: Optional[JobState] = None) -> List[Job]:
+    def list_jobs(self, state: Optional[JobState] = None, limit: Optional[int] = None,
+                  before: Optional[str] = None) -> List[Job]:
         """List jobs, optionally filtered by state"""
-        return self.storage.list_jobs(state)
+        return self.storage.list_jobs(state, limit, before)
+
+    def iter_jobs(self, state: Optional[JobState] = None, limit: Optional[int] = None,
+                  before: Optional[str] = None) -> Iterator[Job]:
+        """Stream jobs newest first; pass the last job's page_token() as before for the next page"""
+        return self.storage.iter_jobs(state, limit, before)
 
     def get_job(self, job_id: str) -> Optional[Job]:
         """Get job by ID"""
@@ -81,22 +133,42 @@ class QueueManager:
 
     def retry_dlq_job(self, job_id: str) -> None:
         """Reset DLQ job to pending with 0 attempts"""
-        job = self.storage.get_job(job_id)
-        if not job:
+        state = self.storage.get_job_state(job_id)
+        if state is None:
             raise JobNotFoundException(f"Job '{job_id}' not found in queue")
         
-        if job.state != JobState.DEAD:
+        if state != _S_DEAD:
             raise InvalidJobStateException(
-                f"Cannot retry job '{job_id}': expected state 'dead', got '{job.state.value}'"
+                f"Cannot retry job '{job_id}': expected state 'dead', got '{state}'"
             )
 
         self.storage.update_job(job_id, {
-            'state': JobState.PENDING.value,
+            'state': _S_PENDING,
             'attempts': 0,
             'error_message': None,
-            'updated_at': datetime.utcnow().isoformat(),
+            'updated_at': self.clock().isoformat(),
         })
+        self._notify()
+    
+    def get_metrics(self, since: Optional[datetime] = None) -> Dict[str, Any]:
+        """Get metrics summary including historical statistics, or only events after since"""
+        return self.storage.get_metrics_summary(since)
+
+    def prune_metrics(self, older_than_days: int) -> int:
+        """Drop metric events older than the retention window"""
+        return self.storage.prune_metrics(older_than_days)
+
+
+@functools.lru_cache(maxsize=1)
+def get_manager(db_path: str) -> QueueManager:
+    """
+    Return a process-wide QueueManager for db_path.
     
-    def get_metrics(self) -> Dict[str, Any]:
-        """Get metrics summary including historical statistics"""
-        return self.storage.get_metrics_summary()
+    Short-lived CLI commands share one manager (and its schema setup) per
+    process instead of constructing a new one per call. Worker processes
+    build their own QueueManager.
+    """
+    config = dataclasses.replace(Config.load(), db_path=db_path)
+    manager = QueueManager(config)
+    atexit.register(manager.storage.close)
+    return manager
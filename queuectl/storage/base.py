@@ -1,7 +1,8 @@
 """Abstract storage interface"""
 
 from abc import ABC, abstractmethod
-from typing import List, Optional, Dict
+from datetime import datetime
+from typing import Iterator, List, Optional, Dict
 from queuectl.models import Job, JobState
 
 
@@ -9,13 +10,23 @@ class StorageInterface(ABC):
     """Abstract base class for job storage implementations"""
 
     @abstractmethod
-    def insert_job(self, job: Job) -> None:
-        """Insert a new job into storage"""
+    def insert_job(self, job: Job, now: Optional[datetime] = None) -> None:
+        """Insert a new job, recording its enqueue metric at now (default: current UTC time)"""
         pass
 
     @abstractmethod
-    def claim_job(self) -> Optional[Job]:
-        """Atomically claim a pending job"""
+    def insert_jobs(self, jobs: List[Job], now: Optional[datetime] = None) -> None:
+        """Insert many jobs and their enqueue metrics at now in a single transaction"""
+        pass
+
+    @abstractmethod
+    def claim_job(self, now: Optional[datetime] = None) -> Optional[Job]:
+        """Atomically claim a pending job that is due at now (default: current UTC time)"""
+        pass
+
+    @abstractmethod
+    def claim_jobs(self, limit: int, now: Optional[datetime] = None) -> List[Job]:
+        """Atomically claim up to limit due pending jobs, in claim order"""
         pass
 
     @abstractmethod
@@ -28,16 +39,35 @@ class StorageInterface(ABC):
         """Update job with arbitrary fields"""
         pass
 
+    @abstractmethod
+    def finalize_job(self, job_id: str, state: JobState, now: datetime, event_type: str, *,
+                     attempts: Optional[int] = None, error: Optional[str] = None,
+                     duration_ms: Optional[int] = None) -> None:
+        """Atomically move a job to its post-execution state and record the metric"""
+        pass
+
     @abstractmethod
     def get_job(self, job_id: str) -> Optional[Job]:
         """Retrieve a job by ID"""
         pass
 
     @abstractmethod
-    def list_jobs(self, state: Optional[JobState] = None) -> List[Job]:
+    def get_job_state(self, job_id: str) -> Optional[str]:
+        """Retrieve only a job's state value by ID"""
+        pass
+
+    @abstractmethod
+    def list_jobs(self, state: Optional[JobState] = None, limit: Optional[int] = None,
+                  before: Optional[str] = None) -> List[Job]:
         """List all jobs, optionally filtered by state"""
         pass
 
+    @abstractmethod
+    def iter_jobs(self, state: Optional[JobState] = None, limit: Optional[int] = None,
+                  before: Optional[str] = None) -> Iterator[Job]:
+        """Yield jobs newest first, optionally filtered by state and paged by Job.page_token()"""
+        pass
+
     @abstractmethod
     def get_job_counts(self) -> Dict[str, int]:
         """Get count of jobs by state"""
@@ -1,85 +1,428 @@
 """SQLite storage implementation with atomic job claiming"""
 
+import os
+import queue
 import sqlite3
+import threading
+import weakref
 from contextlib import contextmanager
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator, Set, Tuple
 
 from queuectl.models import Job, JobState
 from queuectl.storage.base import StorageInterface
 
+# Per-connection tuning (journal_mode=WAL is persistent and set once in _init_db)
+_CONNECTION_PRAGMAS = """
+    PRAGMA synchronous=NORMAL;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA mmap_size=268435456;
+    PRAGMA cache_size=-65536;
+"""
+
+# Job columns in Job field order; rows selected with this list are built
+# positionally by _row_to_job (SELECT * order differs on migrated tables)
+_JOB_COLUMNS = (
+    "id, command, state, attempts, max_retries, priority, run_at, "
+    "created_at, updated_at, error_message, last_executed_at"
+)
+
+# Fixed statements for hot write paths, so no SQL is assembled per call
+_SQL_INSERT_JOB = """
+    INSERT INTO jobs (id, command, state, attempts, max_retries, priority, run_at,
+                      created_at, updated_at, error_message, last_executed_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+_SQL_INSERT_METRIC = """
+    INSERT INTO job_metrics (job_id, event_type, timestamp, ts_us, duration_ms, error_message)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+_SQL_FINALIZE = """
+    UPDATE jobs 
+    SET state = ?, updated_at = ? 
+    WHERE id = ?
+"""
+_SQL_FINALIZE_FAILED = """
+    UPDATE jobs 
+    SET state = ?, updated_at = ?, attempts = COALESCE(?, attempts), 
+        error_message = COALESCE(?, error_message)
+    WHERE id = ?
+"""
+
+# UPDATE ... RETURNING (SQLite 3.35+) claims a job in a single statement
+_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+_SQL_CLAIM_RETURNING = """
+    UPDATE jobs 
+    SET state = 'processing', updated_at = ? 
+    WHERE id = (
+        SELECT id FROM jobs INDEXED BY idx_pending_claim
+        WHERE state = 'pending' 
+        AND (run_at IS NULL OR run_at <= ?)
+        ORDER BY priority DESC, created_at ASC 
+        LIMIT 1
+    )
+    RETURNING """ + _JOB_COLUMNS
+
+# Next due pending jobs in claim order; shared by the batch claim paths
+_SQL_SELECT_DUE_IDS = """
+    SELECT id FROM jobs INDEXED BY idx_pending_claim
+    WHERE state = 'pending' 
+    AND (run_at IS NULL OR run_at <= ?)
+    ORDER BY priority DESC, created_at ASC 
+    LIMIT ?
+"""
+_SQL_CLAIM_MANY_RETURNING = f"""
+    UPDATE jobs 
+    SET state = 'processing', updated_at = ? 
+    WHERE id IN ({_SQL_SELECT_DUE_IDS})
+    RETURNING """ + _JOB_COLUMNS + ", rowid"
+
+_STATES = {state.value: state for state in JobState}
+_fromisoformat = datetime.fromisoformat
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def _epoch_us(dt: datetime) -> int:
+    """Naive UTC datetime to integer microseconds since the Unix epoch"""
+    return (dt - _EPOCH) // _MICROSECOND
+
+
+_SQL_LAST_STARTED = """
+    SELECT ts_us FROM job_metrics
+    WHERE job_id = ? AND event_type = 'started'
+    ORDER BY id DESC
+    LIMIT 1
+"""
+
+# Bump whenever _create_schema changes; databases at this version skip all DDL
+_SCHEMA_VERSION = 2
+
+# Zeroed per-state counts, copied by get_job_counts instead of rebuilt from the enum
+_EMPTY_COUNTS = {state.value: 0 for state in JobState}
+
+# Stores open in this process, and connections a forked child inherited.
+# Those are never used or closed in the child (SQLite handles must not
+# cross fork), only kept referenced so finalizers don't touch the file.
+_LIVE_STORES: "weakref.WeakSet[SQLiteStorage]" = weakref.WeakSet()
+_INHERITED_CONNECTIONS: List[sqlite3.Connection] = []
+
+
+def _reset_stores_after_fork() -> None:
+    """Make every inherited store open fresh connections in the child"""
+    for store in list(_LIVE_STORES):
+        store._forget_connections()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_stores_after_fork)
+
 
 class SQLiteStorage(StorageInterface):
     """SQLite-based storage for jobs with atomic claiming"""
 
-    def __init__(self, db_path: str = "queuectl.db") -> None:
+    def __init__(self, db_path: str = "queuectl.db", read_pool_size: int = 4) -> None:
         self.db_path = db_path
+        # Single writer connection; the lock serializes writers within this
+        # process so they queue in Python instead of spinning on SQLITE_BUSY
+        self._writer: Optional[sqlite3.Connection] = None
+        self._writer_lock = threading.Lock()
+        # Read-only connections, checked out by one reader at a time
+        self._read_pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(maxsize=read_pool_size)
+        # update_job SQL text keyed by the set of updated columns
+        self._update_sql_cache: Dict[frozenset, Tuple[str, Tuple[str, ...]]] = {}
         self._init_db()
+        _LIVE_STORES.add(self)
 
-    def _init_db(self) -> None:
-        """Initialize database schema with priority and scheduling support"""
-        conn = sqlite3.connect(self.db_path)
+    def _connect(self, read_only: bool = False, timeout: float = 30.0) -> sqlite3.Connection:
+        """
+        Open a connection with the per-connection PRAGMAs applied.
+        
+        Connections run in autocommit mode (isolation_level=None); write
+        paths issue BEGIN IMMEDIATE/COMMIT themselves in _transaction().
+        The busy timeout comes from sqlite3.connect(timeout=...).
+        """
+        if read_only:
+            uri = Path(self.db_path).absolute().as_uri() + "?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, timeout=timeout, isolation_level=None,
+                                   check_same_thread=False)
+        else:
+            conn = sqlite3.connect(self.db_path, timeout=timeout, isolation_level=None,
+                                   check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.executescript(_CONNECTION_PRAGMAS)
+        return conn
+
+    def _writer_conn(self) -> sqlite3.Connection:
+        """Return the writer connection, opening it on first use (caller holds _writer_lock)"""
+        if self._writer is None:
+            self._writer = self._connect()
+        return self._writer
+
+    @contextmanager
+    def _read_conn(self) -> Iterator[sqlite3.Connection]:
+        """Check out a read-only connection from the pool, returning it afterwards"""
+        if self.db_path == ":memory:":
+            # An in-memory database only exists on the writer connection
+            with self._writer_lock:
+                yield self._writer_conn()
+            return
+        
         try:
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS jobs (
-                    id TEXT PRIMARY KEY,
-                    command TEXT NOT NULL,
-                    state TEXT NOT NULL CHECK(state IN ('pending','processing','completed','failed','dead')),
-                    attempts INTEGER DEFAULT 0,
-                    max_retries INTEGER DEFAULT 3,
-                    priority INTEGER DEFAULT 5 CHECK(priority BETWEEN 1 AND 10),
-                    run_at TEXT,
-                    created_at TEXT NOT NULL,
-                    updated_at TEXT NOT NULL,
-                    error_message TEXT,
-                    last_executed_at TEXT
-                )
-            """)
-            
-            # Add new columns if they don't exist (migration)
+            conn = self._read_pool.get_nowait()
+        except queue.Empty:
+            conn = self._connect(read_only=True)
+        try:
+            yield conn
+        finally:
             try:
-                conn.execute("ALTER TABLE jobs ADD COLUMN priority INTEGER DEFAULT 5")
-            except sqlite3.OperationalError:
-                pass  # Column already exists
-            
+                self._read_pool.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+    def close(self) -> None:
+        """Close the writer and all pooled reader connections"""
+        with self._writer_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        while True:
             try:
-                conn.execute("ALTER TABLE jobs ADD COLUMN run_at TEXT")
-            except sqlite3.OperationalError:
-                pass  # Column already exists
-            
-            conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_state_priority_created 
-                ON jobs(state, priority DESC, created_at ASC)
-            """)
-            conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_state_runat 
-                ON jobs(state, run_at)
-            """)
-            
-            # Add metrics table for historical statistics
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS job_metrics (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    job_id TEXT NOT NULL,
-                    event_type TEXT NOT NULL CHECK(event_type IN ('enqueued','started','completed','failed','dlq')),
-                    timestamp TEXT NOT NULL,
-                    duration_ms INTEGER,
-                    error_message TEXT
-                )
-            """)
+                self._read_pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def _forget_connections(self) -> None:
+        """Drop connections inherited across fork; new ones open on demand"""
+        if self._writer is not None:
+            _INHERITED_CONNECTIONS.append(self._writer)
+        while True:
+            try:
+                _INHERITED_CONNECTIONS.append(self._read_pool.get_nowait())
+            except queue.Empty:
+                break
+        self._writer = None
+        self._writer_lock = threading.Lock()
+        self._read_pool = queue.LifoQueue(maxsize=self._read_pool.maxsize)
+
+    def _init_db(self) -> None:
+        """
+        Initialize database schema with priority and scheduling support.
+        
+        PRAGMA user_version records the schema version, so a database that
+        is already current costs one PRAGMA read instead of re-running the DDL.
+        """
+        with self._writer_lock:
+            conn = self._writer_conn()
+            if self._schema_version(conn) >= _SCHEMA_VERSION:
+                return
+
+            # Database-level settings, which cannot change inside a transaction.
+            # auto_vacuum lets prune_metrics hand freed pages back to the
+            # filesystem; it only takes effect on newly created databases.
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            # WAL lets readers proceed while a worker holds the write lock
+            # (in-memory databases have no journal file to switch)
+            if self.db_path != ":memory:":
+                conn.execute("PRAGMA journal_mode=WAL")
+
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Another process may have migrated while we waited for the lock
+                if self._schema_version(conn) < _SCHEMA_VERSION:
+                    self._create_schema(conn)
+                    conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    @staticmethod
+    def _schema_version(conn: sqlite3.Connection) -> int:
+        """Return the schema version stored in the database header"""
+        version: int = conn.execute("PRAGMA user_version").fetchone()[0]
+        return version
+
+    @staticmethod
+    def _table_columns(conn: sqlite3.Connection, table: str) -> Set[str]:
+        """Return the column names of a table"""
+        return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+    @staticmethod
+    def _index_columns(conn: sqlite3.Connection, index: str) -> List[str]:
+        """Return the key columns of an index in order (empty if it doesn't exist)"""
+        return [row[2] for row in conn.execute(f"PRAGMA index_info({index})")]
+
+    def _create_schema(self, conn: sqlite3.Connection) -> None:
+        """Create tables, migrate columns and build indexes (idempotent, run inside a transaction)"""
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                command TEXT NOT NULL,
+                state TEXT NOT NULL CHECK(state IN ('pending','processing','completed','failed','dead')),
+                attempts INTEGER DEFAULT 0,
+                max_retries INTEGER DEFAULT 3,
+                priority INTEGER DEFAULT 5 CHECK(priority BETWEEN 1 AND 10),
+                run_at TEXT,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL,
+                error_message TEXT,
+                last_executed_at TEXT
+            )
+        """)
+
+        # Add new columns if they don't exist (migration)
+        jobs_columns = self._table_columns(conn, 'jobs')
+        if 'priority' not in jobs_columns:
+            conn.execute("ALTER TABLE jobs ADD COLUMN priority INTEGER DEFAULT 5")
+        if 'run_at' not in jobs_columns:
+            conn.execute("ALTER TABLE jobs ADD COLUMN run_at TEXT")
+
+        # Claim path: only pending rows, already in claim order, so the
+        # scan stops at LIMIT 1 however much history the table holds.
+        # The claim queries name it with INDEXED BY, since without
+        # statistics the planner prefers the state equality indexes.
+        new_claim_index = not conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'idx_pending_claim'"
+        ).fetchone()
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_pending_claim 
+            ON jobs(priority DESC, created_at ASC, run_at) WHERE state = 'pending'
+        """)
+        # Superseded by idx_pending_claim; only present in older databases
+        conn.execute("DROP INDEX IF EXISTS idx_state_priority_created")
+        conn.execute("DROP INDEX IF EXISTS idx_state_runat")
+        # list_jobs ordering and keyset pages, filtered and unfiltered; id
+        # breaks created_at ties, so paging never needs a temp B-tree sort.
+        # Older databases have these without id and get them rebuilt.
+        rebuilt_list_index = False
+        for index in ('idx_state_created', 'idx_created'):
+            columns = self._index_columns(conn, index)
+            if columns and columns[-1] != 'id':
+                conn.execute(f"DROP INDEX {index}")
+                rebuilt_list_index = True
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_state_created 
+            ON jobs(state, created_at DESC, id DESC)
+        """)
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_created 
+            ON jobs(created_at DESC, id DESC)
+        """)
+
+        # Per-state job counts kept current by triggers, so stats reads
+        # touch five rows instead of scanning the whole jobs table
+        new_counts_table = not conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'job_state_counts'"
+        ).fetchone()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS job_state_counts (
+                state TEXT PRIMARY KEY,
+                n INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        if new_counts_table:
+            conn.executemany(
+                "INSERT INTO job_state_counts (state, n) "
+                "VALUES (?, (SELECT COUNT(*) FROM jobs WHERE state = ?))",
+                [(state.value, state.value) for state in JobState],
+            )
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_jobs_count_insert AFTER INSERT ON jobs
+            BEGIN
+                UPDATE job_state_counts SET n = n + 1 WHERE state = NEW.state;
+            END
+        """)
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_jobs_count_delete AFTER DELETE ON jobs
+            BEGIN
+                UPDATE job_state_counts SET n = n - 1 WHERE state = OLD.state;
+            END
+        """)
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_jobs_count_update AFTER UPDATE OF state ON jobs
+            WHEN OLD.state <> NEW.state
+            BEGIN
+                UPDATE job_state_counts SET n = n - 1 WHERE state = OLD.state;
+                UPDATE job_state_counts SET n = n + 1 WHERE state = NEW.state;
+            END
+        """)
+
+        # Add metrics table for historical statistics
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS job_metrics (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_id TEXT NOT NULL,
+                event_type TEXT NOT NULL CHECK(event_type IN ('enqueued','started','completed','failed','dlq')),
+                timestamp TEXT NOT NULL,
+                ts_us INTEGER,
+                duration_ms INTEGER,
+                error_message TEXT
+            )
+        """)
+        # Integer epoch microseconds alongside the ISO text, for arithmetic
+        if 'ts_us' not in self._table_columns(conn, 'job_metrics'):
+            conn.execute("ALTER TABLE job_metrics ADD COLUMN ts_us INTEGER")
             conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_metrics_timestamp 
-                ON job_metrics(timestamp DESC)
+                UPDATE job_metrics
+                SET ts_us = CAST(strftime('%s', timestamp) AS INTEGER) * 1000000
+                            + CAST(substr(timestamp, 21, 6) AS INTEGER)
+                WHERE ts_us IS NULL
             """)
+
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_metrics_timestamp 
+            ON job_metrics(timestamp DESC)
+        """)
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_metrics_jobid 
+            ON job_metrics(job_id)
+        """)
+
+        # Running per-event totals kept by a trigger, so the metrics summary
+        # never scans or self-joins the ever-growing job_metrics log
+        new_rollup_table = not conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'metric_rollup'"
+        ).fetchone()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS metric_rollup (
+                event_type TEXT PRIMARY KEY,
+                n INTEGER NOT NULL DEFAULT 0,
+                timed INTEGER NOT NULL DEFAULT 0,
+                sum_duration_ms INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        if new_rollup_table:
             conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_metrics_jobid 
-                ON job_metrics(job_id)
+                INSERT INTO metric_rollup (event_type, n, timed, sum_duration_ms)
+                SELECT event_type, COUNT(*), COUNT(duration_ms), COALESCE(SUM(duration_ms), 0)
+                FROM job_metrics
+                GROUP BY event_type
             """)
-            
-            conn.commit()
-        finally:
-            conn.close()
+            conn.executemany(
+                "INSERT OR IGNORE INTO metric_rollup (event_type) VALUES (?)",
+                [(event,) for event in ('enqueued', 'started', 'completed', 'failed', 'dlq')],
+            )
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_metrics_rollup AFTER INSERT ON job_metrics
+            BEGIN
+                UPDATE metric_rollup
+                SET n = n + 1,
+                    timed = timed + (NEW.duration_ms IS NOT NULL),
+                    sum_duration_ms = sum_duration_ms + COALESCE(NEW.duration_ms, 0)
+                WHERE event_type = NEW.event_type;
+            END
+        """)
+
+        # Collect planner statistics once for a freshly created database,
+        # and again when an upgraded database gains or rebuilds an index
+        has_stats = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'"
+        ).fetchone()
+        if not has_stats or new_claim_index or rebuilt_list_index:
+            conn.execute("ANALYZE")
 
     @contextmanager
     def _transaction(self):  # type: ignore[no-untyped-def]
@@ -101,77 +444,131 @@ class SQLiteStorage(StorageInterface):
         - SERIALIZABLE isolation can be achieved with EXCLUSIVE locks
         - For distributed systems, use PostgreSQL or Redis
         """
-        conn = sqlite3.connect(self.db_path, timeout=30.0)
-        conn.row_factory = sqlite3.Row
-        try:
+        with self._writer_lock:
+            conn = self._writer_conn()
             conn.execute("BEGIN IMMEDIATE")
-            yield conn
-            conn.commit()
-        except Exception:
-            conn.rollback()
-            raise
-        finally:
-            conn.close()
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
 
     def _row_to_job(self, row: sqlite3.Row) -> Job:
-        """Convert database row to Job object"""
-        try:
-            priority = row['priority']
-        except IndexError:
-            priority = 5
-        
-        try:
-            run_at = row['run_at']
-        except IndexError:
-            run_at = None
-        
-        return Job.from_dict({
-            'id': row['id'],
-            'command': row['command'],
-            'state': row['state'],
-            'attempts': row['attempts'],
-            'max_retries': row['max_retries'],
-            'priority': priority,
-            'run_at': run_at,
-            'created_at': row['created_at'],
-            'updated_at': row['updated_at'],
-            'error_message': row['error_message'],
-            'last_executed_at': row['last_executed_at'],
-        })
-
-    def insert_job(self, job: Job) -> None:
-        """Insert a new job into storage"""
+        """Convert a row selected with _JOB_COLUMNS to a Job (positional, no dict)"""
+        run_at = row[6]
+        last_executed_at = row[10]
+        return Job(
+            row[0], row[1], _STATES[row[2]], row[3], row[4], row[5],
+            _fromisoformat(run_at) if run_at else None,
+            _fromisoformat(row[7]),
+            _fromisoformat(row[8]),
+            row[9],
+            _fromisoformat(last_executed_at) if last_executed_at else None,
+        )
+
+    @staticmethod
+    def _job_params(job: Job) -> tuple:
+        """Build the _SQL_INSERT_JOB parameter tuple for a job"""
+        return (
+            job.id,
+            job.command,
+            job.state.value,
+            job.attempts,
+            job.max_retries,
+            job.priority,
+            job.run_at.isoformat() if job.run_at else None,
+            job.created_at.isoformat(),
+            job.updated_at.isoformat(),
+            job.error_message,
+            job.last_executed_at.isoformat() if job.last_executed_at else None,
+        )
+
+    def insert_job(self, job: Job, now: Optional[datetime] = None) -> None:
+        """Insert a new job into storage, stamping its enqueue metric with now"""
+        if now is None:
+            now = datetime.utcnow()
         with self._transaction() as conn:
-            conn.execute("""
-                INSERT INTO jobs (id, command, state, attempts, max_retries, priority, run_at,
-                                  created_at, updated_at, error_message, last_executed_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                job.id,
-                job.command,
-                job.state.value,
-                job.attempts,
-                job.max_retries,
-                job.priority,
-                job.run_at.isoformat() if job.run_at else None,
-                job.created_at.isoformat(),
-                job.updated_at.isoformat(),
-                job.error_message,
-                job.last_executed_at.isoformat() if job.last_executed_at else None,
-            ))
+            conn.execute(_SQL_INSERT_JOB, self._job_params(job))
             # Record enqueue metric
-            self._record_metric(conn, job.id, 'enqueued')
+            self._record_metric(conn, job.id, 'enqueued', now=now)
 
-    def claim_job(self) -> Optional[Job]:
+    def insert_jobs(self, jobs: List[Job], now: Optional[datetime] = None) -> None:
+        """Insert many jobs and their enqueue metrics in a single transaction"""
+        if not jobs:
+            return
+        if now is None:
+            now = datetime.utcnow()
+        
+        with self._transaction() as conn:
+            self._insert_jobs(conn, jobs, now)
+
+    def _insert_jobs(self, conn: Any, jobs: List[Job], now: datetime) -> None:
+        """Insert jobs and their enqueue metrics inside the caller's transaction"""
+        stamp, ts_us = now.isoformat(), _epoch_us(now)
+        conn.executemany(_SQL_INSERT_JOB, [self._job_params(job) for job in jobs])
+        conn.executemany(_SQL_INSERT_METRIC,
+                         [(job.id, 'enqueued', stamp, ts_us, None, None) for job in jobs])
+
+    def claim_job(self, now: Optional[datetime] = None) -> Optional[Job]:
         """Atomically claim a pending job with priority and scheduling support"""
+        if now is None:
+            now = datetime.utcnow()
+        if not _HAS_RETURNING:
+            return self._claim_job_select_update(now)
+        
+        stamp = now.isoformat()
+        with self._transaction() as conn:
+            # Select and mark the job in one statement (SQLite 3.35+)
+            row = conn.execute(_SQL_CLAIM_RETURNING, (stamp, stamp)).fetchone()
+            if row is None:
+                return None
+            # Record start metric
+            self._record_metric(conn, row[0], 'started', now=now)
+            return self._row_to_job(row)
+
+    def claim_jobs(self, limit: int, now: Optional[datetime] = None) -> List[Job]:
+        """
+        Atomically claim up to limit due pending jobs in one transaction.
+        
+        Takes the writer lock once for the whole batch. Jobs come back in
+        claim order (priority, then age, then insertion), the order claim_job
+        would take them, and each gets a 'started' event.
+        """
+        if limit < 1:
+            raise ValueError(f"limit must be at least 1, got {limit}")
+        if now is None:
+            now = datetime.utcnow()
+        stamp, ts_us = now.isoformat(), _epoch_us(now)
         with self._transaction() as conn:
-            cursor = conn.execute("""
-                SELECT * FROM jobs 
+            if _HAS_RETURNING:
+                rows = conn.execute(_SQL_CLAIM_MANY_RETURNING, (stamp, stamp, limit)).fetchall()
+            else:
+                ids = [row[0] for row in conn.execute(_SQL_SELECT_DUE_IDS, (stamp, limit))]
+                conn.executemany("UPDATE jobs SET state = 'processing', updated_at = ? WHERE id = ?",
+                                 [(stamp, job_id) for job_id in ids])
+                placeholders = ", ".join("?" * len(ids))
+                rows = conn.execute(
+                    f"SELECT {_JOB_COLUMNS}, rowid FROM jobs WHERE id IN ({placeholders})", ids
+                ).fetchall() if ids else []
+            conn.executemany(_SQL_INSERT_METRIC,
+                             [(row[0], 'started', stamp, ts_us, None, None) for row in rows])
+        # RETURNING (and IN) give no row order guarantee; rowid breaks the
+        # created_at ties of enqueue_many batches as idx_pending_claim does
+        rows.sort(key=lambda row: (-row[5], row[7], row[11]))
+        return [self._row_to_job(row) for row in rows]
+
+    def _claim_job_select_update(self, now: datetime) -> Optional[Job]:
+        """Claim via separate SELECT and UPDATE, for SQLite without RETURNING"""
+        stamp = now.isoformat()
+        with self._transaction() as conn:
+            cursor = conn.execute(f"""
+                SELECT {_JOB_COLUMNS} FROM jobs INDEXED BY idx_pending_claim
                 WHERE state = 'pending' 
                 AND (run_at IS NULL OR run_at <= ?)
                 ORDER BY priority DESC, created_at ASC 
                 LIMIT 1
-            """, (datetime.utcnow().isoformat(),))
+            """, (stamp,))
             row = cursor.fetchone()
             
             if row:
@@ -180,21 +577,22 @@ class SQLiteStorage(StorageInterface):
                     UPDATE jobs 
                     SET state = 'processing', updated_at = ? 
                     WHERE id = ?
-                """, (datetime.utcnow().isoformat(), job.id))
+                """, (stamp, job.id))
                 job.state = JobState.PROCESSING
-                job.updated_at = datetime.utcnow()
+                job.updated_at = now
                 # Record start metric
-                self._record_metric(conn, job.id, 'started')
+                self._record_metric(conn, job.id, 'started', now=now)
                 return job
             
             return None
     
-    def _record_metric(self, conn: Any, job_id: str, event_type: str, duration_ms: Optional[int] = None, error_message: Optional[str] = None) -> None:
+    def _record_metric(self, conn: Any, job_id: str, event_type: str, duration_ms: Optional[int] = None,
+                       error_message: Optional[str] = None, now: Optional[datetime] = None) -> None:
         """Record a job metric event"""
-        conn.execute("""
-            INSERT INTO job_metrics (job_id, event_type, timestamp, duration_ms, error_message)
-            VALUES (?, ?, ?, ?, ?)
-        """, (job_id, event_type, datetime.utcnow().isoformat(), duration_ms, error_message))
+        if now is None:
+            now = datetime.utcnow()
+        conn.execute(_SQL_INSERT_METRIC,
+                     (job_id, event_type, now.isoformat(), _epoch_us(now), duration_ms, error_message))
 
     def update_job_state(self, job_id: str, state: JobState) -> None:
         """Update job state"""
@@ -210,97 +608,210 @@ class SQLiteStorage(StorageInterface):
         if not updates:
             return
 
-        # Build dynamic UPDATE query
-        set_clauses = ', '.join(f"{key} = ?" for key in updates.keys())
-        values = list(updates.values()) + [job_id]
+        # Build the UPDATE query once per set of columns and reuse it
+        shape = frozenset(updates)
+        cached = self._update_sql_cache.get(shape)
+        if cached is None:
+            columns = tuple(sorted(shape))
+            set_clauses = ', '.join(f"{key} = ?" for key in columns)
+            cached = (f"UPDATE jobs SET {set_clauses} WHERE id = ?", columns)
+            self._update_sql_cache[shape] = cached
+        sql, columns = cached
+        values = [updates[key] for key in columns]
+        values.append(job_id)
 
         with self._transaction() as conn:
+            conn.execute(sql, values)
+
+    def finalize_job(self, job_id: str, state: JobState, now: datetime, event_type: str, *,
+                     attempts: Optional[int] = None, error: Optional[str] = None,
+                     duration_ms: Optional[int] = None) -> None:
+        """
+        Atomically move a job to its post-execution state and record the metric.
+        
+        One transaction runs one UPDATE and one metric INSERT, using fixed
+        statements per update shape. attempts and error are left unchanged
+        when None. A completion without a measured duration_ms is timed
+        from the job's latest 'started' event.
+        """
+        stamp, ts_us = now.isoformat(), _epoch_us(now)
+        with self._transaction() as conn:
+            if event_type == 'completed' and duration_ms is None:
+                started = conn.execute(_SQL_LAST_STARTED, (job_id,)).fetchone()
+                if started and started[0] is not None:
+                    duration_ms = (ts_us - started[0]) // 1000
+            if attempts is None and error is None:
+                conn.execute(_SQL_FINALIZE, (state.value, stamp, job_id))
+            else:
+                conn.execute(_SQL_FINALIZE_FAILED, (state.value, stamp, attempts, error, job_id))
+            conn.execute(_SQL_INSERT_METRIC, (job_id, event_type, stamp, ts_us, duration_ms, error))
+
+    def _complete_due_pending(self, now: datetime, new_jobs: Optional[List[Job]] = None) -> int:
+        """
+        Claim and complete every due pending job in one transaction.
+        
+        Records the same 'started' and 'completed' events as claiming and
+        finalizing each job, with a zero duration. new_jobs are enqueued
+        first in the same transaction. Used by tests that only need many
+        finished jobs and don't exercise claim ordering.
+        """
+        stamp, ts_us = now.isoformat(), _epoch_us(now)
+        due = "FROM jobs WHERE state = 'pending' AND (run_at IS NULL OR run_at <= ?)"
+        with self._transaction() as conn:
+            if new_jobs:
+                self._insert_jobs(conn, new_jobs, now)
             conn.execute(f"""
-                UPDATE jobs 
-                SET {set_clauses}
-                WHERE id = ?
-            """, values)
+                INSERT INTO job_metrics (job_id, event_type, timestamp, ts_us, duration_ms, error_message)
+                SELECT id, 'started', ?, ?, NULL, NULL {due}
+            """, (stamp, ts_us, stamp))
+            conn.execute(f"""
+                INSERT INTO job_metrics (job_id, event_type, timestamp, ts_us, duration_ms, error_message)
+                SELECT id, 'completed', ?, ?, 0, NULL {due}
+            """, (stamp, ts_us, stamp))
+            cursor = conn.execute(f"""
+                UPDATE jobs SET state = 'completed', updated_at = ?
+                WHERE id IN (SELECT id {due})
+            """, (stamp, stamp))
+            completed: int = cursor.rowcount
+        return completed
 
     def get_job(self, job_id: str) -> Optional[Job]:
         """Retrieve a job by ID"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        try:
-            cursor = conn.execute("""
-                SELECT * FROM jobs WHERE id = ?
+        with self._read_conn() as conn:
+            cursor = conn.execute(f"""
+                SELECT {_JOB_COLUMNS} FROM jobs WHERE id = ?
             """, (job_id,))
             row = cursor.fetchone()
             return self._row_to_job(row) if row else None
-        finally:
-            conn.close()
 
-    def list_jobs(self, state: Optional[JobState] = None) -> List[Job]:
+    def get_job_state(self, job_id: str) -> Optional[str]:
+        """Retrieve only a job's state value by ID (no Job materialization)"""
+        with self._read_conn() as conn:
+            row = conn.execute("SELECT state FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            return row[0] if row else None
+
+    def list_jobs(self, state: Optional[JobState] = None, limit: Optional[int] = None,
+                  before: Optional[str] = None) -> List[Job]:
         """List all jobs, optionally filtered by state"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        try:
-            if state:
-                cursor = conn.execute("""
-                    SELECT * FROM jobs 
-                    WHERE state = ? 
-                    ORDER BY created_at DESC
-                """, (state.value,))
+        return list(self.iter_jobs(state, limit, before))
+
+    def iter_jobs(self, state: Optional[JobState] = None, limit: Optional[int] = None,
+                  before: Optional[str] = None) -> Iterator[Job]:
+        """
+        Yield jobs newest first, optionally filtered by state.
+        
+        Rows are read from the cursor as they are consumed, so memory stays
+        page-sized. Keyset pagination: pass the page_token() of the last job
+        seen as before to continue after it. Jobs from one enqueue_many batch
+        share a created_at, so id breaks the tie (both are in the listing
+        indexes); a bare created_at is still accepted and skips everything
+        at that instant.
+        """
+        clauses = []
+        params: List[Any] = []
+        if state:
+            clauses.append("state = ?")
+            params.append(state.value)
+        if before:
+            created_at, _, job_id = before.partition('|')
+            if job_id:
+                clauses.append("(created_at, id) < (?, ?)")
+                params.extend((created_at, job_id))
             else:
-                cursor = conn.execute("""
-                    SELECT * FROM jobs 
-                    ORDER BY created_at DESC
-                """)
-            
-            return [self._row_to_job(row) for row in cursor.fetchall()]
-        finally:
-            conn.close()
+                clauses.append("created_at < ?")
+                params.append(created_at)
+        
+        sql = f"SELECT {_JOB_COLUMNS} FROM jobs"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY created_at DESC, id DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        if self.db_path == ":memory:":
+            # The in-memory reader is the locked writer; release it before
+            # handing jobs to a caller that may write
+            with self._read_conn() as conn:
+                rows = conn.execute(sql, params).fetchall()
+            for row in rows:
+                yield self._row_to_job(row)
+            return
+
+        with self._read_conn() as conn:
+            for row in conn.execute(sql, params):
+                yield self._row_to_job(row)
 
     def get_job_counts(self) -> Dict[str, int]:
-        """Get count of jobs by state"""
-        conn = sqlite3.connect(self.db_path)
-        try:
-            cursor = conn.execute("""
-                SELECT state, COUNT(*) as count 
-                FROM jobs 
-                GROUP BY state
-            """)
-            
-            counts = {state.value: 0 for state in JobState}
-            for row in cursor.fetchall():
-                counts[row[0]] = row[1]
-            
+        """Get count of jobs by state (read from the trigger-maintained job_state_counts)"""
+        with self._read_conn() as conn:
+            cursor = conn.execute("SELECT state, n FROM job_state_counts")
+
+            counts = dict(_EMPTY_COUNTS)
+            for state, count in cursor:
+                counts[state] = count
+
             return counts
-        finally:
-            conn.close()
     
-    def get_metrics_summary(self) -> Dict[str, Any]:
-        """Get summary statistics from job metrics"""
-        conn = sqlite3.connect(self.db_path)
-        try:
-            # Get total counts by event type
-            cursor = conn.execute("""
-                SELECT event_type, COUNT(*) as count 
-                FROM job_metrics 
-                GROUP BY event_type
-            """)
-            event_counts = {row[0]: row[1] for row in cursor.fetchall()}
-            
-            # Get average execution time (start to completed)
-            cursor = conn.execute("""
-                SELECT AVG(c.timestamp - s.timestamp) as avg_duration
-                FROM job_metrics s
-                JOIN job_metrics c ON s.job_id = c.job_id
-                WHERE s.event_type = 'started' AND c.event_type = 'completed'
-            """)
-            avg_duration = cursor.fetchone()[0]
-            
+    def prune_metrics(self, older_than_days: int) -> int:
+        """
+        Delete metric events older than the given age and return how many went.
+        
+        metric_rollup keeps its all-time totals; only the raw event log shrinks.
+        Freed pages are then released with an incremental vacuum.
+        """
+        cutoff = (datetime.utcnow() - timedelta(days=older_than_days)).isoformat()
+        with self._transaction() as conn:
+            removed: int = conn.execute("DELETE FROM job_metrics WHERE timestamp < ?", (cutoff,)).rowcount
+        with self._writer_lock:
+            self._writer_conn().execute("PRAGMA incremental_vacuum").fetchall()
+        return removed
+
+    def checkpoint(self) -> None:
+        """Fold the WAL back into the database, truncate it, and refresh planner stats"""
+        if self.db_path == ":memory:":
+            return
+        with self._writer_lock:
+            conn = self._writer_conn()
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+            conn.execute("PRAGMA optimize")
+
+    def get_metrics_summary(self, since: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Get summary statistics from the metric rollup and the recent event tail.
+        
+        With since, counts, average duration and recent events cover only
+        events after that time, found with a range seek on
+        idx_metrics_timestamp instead of the all-time rollup.
+        """
+        params: Tuple[str, ...] = ()
+        if since is None:
+            totals_sql = "SELECT event_type, n, timed, sum_duration_ms FROM metric_rollup WHERE n > 0"
+            where = ""
+        else:
+            totals_sql = """
+                SELECT event_type, COUNT(*), COUNT(duration_ms), COALESCE(SUM(duration_ms), 0)
+                FROM job_metrics WHERE timestamp > ? GROUP BY event_type
+            """
+            where = "WHERE timestamp > ?"
+            params = (since.isoformat(),)
+
+        with self._read_conn() as conn:
+            # Get total counts by event type, and average completed duration
+            event_counts: Dict[str, int] = {}
+            avg_duration = 0.0
+            for event_type, n, timed, sum_duration_ms in conn.execute(totals_sql, params):
+                event_counts[event_type] = n
+                if event_type == 'completed' and timed:
+                    avg_duration = sum_duration_ms / timed / 1000.0
+
             # Get recent metrics (last 100 events)
-            cursor = conn.execute("""
+            cursor = conn.execute(f"""
                 SELECT job_id, event_type, timestamp, duration_ms, error_message
-                FROM job_metrics 
+                FROM job_metrics {where}
                 ORDER BY timestamp DESC 
                 LIMIT 100
-            """)
+            """, params)
             recent_events = [
                 {
                     'job_id': row[0],
@@ -311,11 +822,9 @@ class SQLiteStorage(StorageInterface):
                 }
                 for row in cursor.fetchall()
             ]
-            
+
             return {
                 'event_counts': event_counts,
-                'avg_duration_seconds': avg_duration if avg_duration else 0,
+                'avg_duration_seconds': avg_duration,
                 'recent_events': recent_events
             }
-        finally:
-            conn.close()
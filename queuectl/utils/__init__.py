@@ -1,3 +1,5 @@
-from .logging import setup_logger
+from .logging import setup_logger, start_log_listener
+from .serialization import json_loads, json_dumps, json_dumps_bytes
+from .timeutils import local_to_utc
 
-__all__ = ['setup_logger']
+__all__ = ['setup_logger', 'start_log_listener', 'json_loads', 'json_dumps', 'json_dumps_bytes', 'local_to_utc']
@@ -1,21 +1,19 @@
 """Logging utilities"""
 
 import logging
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
 
+# Configured loggers by name, so repeat calls skip handler setup
+_LOGGERS: Dict[str, logging.Logger] = {}
 
-def setup_logger(name: str) -> logging.Logger:
-    """Configure structured logging"""
+
+def _log_handlers(name: str) -> List[logging.Handler]:
+    """Build the file (INFO) and console (WARNING) handlers for a logger name"""
     log_dir = Path.home() / ".queuectl" / "logs"
     log_dir.mkdir(parents=True, exist_ok=True)
 
-    logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
-
-    # Avoid duplicate handlers
-    if logger.handlers:
-        return logger
-
     # File handler
     fh = logging.FileHandler(log_dir / f"{name}.log")
     fh.setLevel(logging.INFO)
@@ -31,7 +29,43 @@ def setup_logger(name: str) -> logging.Logger:
     fh.setFormatter(formatter)
     ch.setFormatter(formatter)
 
-    logger.addHandler(fh)
-    logger.addHandler(ch)
+    return [fh, ch]
+
+
+def setup_logger(name: str, log_queue: Optional[Any] = None) -> logging.Logger:
+    """
+    Configure structured logging
+
+    With log_queue, records are only enqueued; a listener started with
+    start_log_listener formats and writes them off the caller's hot path.
+    """
+    cached = _LOGGERS.get(name)
+    if cached is not None:
+        return cached
 
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+    # Avoid duplicate handlers
+    if not logger.handlers:
+        handlers = [QueueHandler(log_queue)] if log_queue is not None else _log_handlers(name)
+        for handler in handlers:
+            logger.addHandler(handler)
+
+    _LOGGERS[name] = logger
     return logger
+
+
+def start_log_listener(log_queue: Any, names: Iterable[str]) -> QueueListener:
+    """Start one background thread writing queued records to each name's log file"""
+    handlers: List[logging.Handler] = []
+    for name in names:
+        for handler in _log_handlers(name):
+            # Route each record only to its own logger's file
+            handler.addFilter(logging.Filter(name))
+            handlers.append(handler)
+
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
@@ -0,0 +1,46 @@
+"""JSON serialization helpers with optional orjson acceleration"""
+
+import json
+from datetime import datetime
+from typing import Any
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:  # pragma: no cover - exercised when orjson is absent
+    HAS_ORJSON = False
+
+# stdlib separators matching orjson's compact output, so the bytes don't
+# depend on whether the optional extra is installed
+_COMPACT = (',', ':')
+
+
+def json_loads(data: str | bytes) -> Any:
+    """Parse JSON text, using orjson when it is installed"""
+    if HAS_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps(obj: Any, indent: bool = False) -> str:
+    """Serialize to JSON text, using orjson when it is installed"""
+    if HAS_ORJSON:
+        option = orjson.OPT_INDENT_2 if indent else 0
+        return orjson.dumps(obj, option=option).decode()
+    if indent:
+        return json.dumps(obj, indent=2, ensure_ascii=False)
+    return json.dumps(obj, separators=_COMPACT, ensure_ascii=False)
+
+
+def _encode_datetime(obj: Any) -> str:
+    """stdlib json fallback for the datetimes orjson encodes natively"""
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def json_dumps_bytes(obj: Any) -> bytes:
+    """Serialize to UTF-8 JSON bytes for HTTP bodies; datetimes become ISO8601"""
+    if HAS_ORJSON:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=_COMPACT, ensure_ascii=False, default=_encode_datetime).encode()
@@ -0,0 +1,13 @@
+"""Time conversion helpers"""
+
+from datetime import datetime, timezone
+
+
+def local_to_utc(dt: datetime) -> datetime:
+    """
+    Convert a local (naive) or offset-aware datetime to naive UTC.
+    
+    Naive values are interpreted in the system's local timezone, with
+    DST resolved for that specific date. Storage compares naive UTC values.
+    """
+    return dt.astimezone(timezone.utc).replace(tzinfo=None)
@@ -1,20 +1,75 @@
 """Flask web application for monitoring QueueCTL"""
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, Response, render_template, request
 from queuectl.config import Config
 from queuectl.queue import QueueManager
-from queuectl.models import JobState
-from datetime import datetime, timedelta, timezone
-from typing import Any, Optional
+from queuectl.models import Job, JobState
+from queuectl.utils import json_dumps_bytes, local_to_utc
+import threading
 import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+# Seconds a polled summary endpoint reuses its last result
+_SUMMARY_TTL = 1.0
+
+
+def _json(obj: Any, status: int = 200) -> Response:
+    """JSON response encoded with orjson when installed (datetimes handled natively)"""
+    return Response(json_dumps_bytes(obj), status=status, mimetype='application/json')
+
+
+class _TTLCache:
+    """Memoizes a no-argument function for ttl seconds, shared across request threads"""
+
+    def __init__(self, func: Callable[[], Any], ttl: float = _SUMMARY_TTL):
+        self.func = func
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entry: Optional[Tuple[float, Any]] = None
+
+    def get(self) -> Any:
+        """Return the cached result, recomputing it once it is older than ttl"""
+        with self._lock:
+            if self._entry is None or time.monotonic() - self._entry[0] >= self.ttl:
+                self._entry = (time.monotonic(), self.func())
+            return self._entry[1]
+
+    def clear(self) -> None:
+        """Drop the cached result so the next get() reads fresh data"""
+        with self._lock:
+            self._entry = None
+
+
+def _job_to_api_dict(job: Job) -> Dict[str, Any]:
+    """Serialize a Job for the /api/jobs response (datetimes left to the encoder)"""
+    return {
+        'id': job.id,
+        'command': job.command,
+        'state': job.state.value,
+        'priority': job.priority,
+        'attempts': job.attempts,
+        'max_retries': job.max_retries,
+        'created_at': job.created_at,
+        'updated_at': job.updated_at,
+        'run_at': job.run_at,
+        'error_message': job.error_message,
+    }
 
 
 def create_app(config_path: Optional[str] = None) -> Flask:
     """Create and configure Flask application"""
     app = Flask(__name__)
-    app.config['JSON_SORT_KEYS'] = False
     
     config = Config.load() if not config_path else Config.load()
     manager = QueueManager(config)
+    # Dashboards poll these every few seconds; concurrent browsers share one read
+    stats_cache = _TTLCache(manager.get_stats)
+    metrics_cache = _TTLCache(manager.get_metrics)
+    
+    def invalidate_summaries() -> None:
+        """Show this app's own writes on the next poll"""
+        stats_cache.clear()
+        metrics_cache.clear()
     
     @app.route('/')
     def index() -> str:
@@ -24,40 +79,37 @@ def create_app(config_path: Optional[str] = None) -> Flask:
     @app.route('/api/stats')
     def api_stats() -> Any:
         """Get queue statistics"""
-        stats = manager.get_stats()
-        return jsonify(stats)
+        stats = stats_cache.get()
+        return _json(stats)
     
     @app.route('/api/jobs')
     def api_jobs() -> Any:
-        """Get list of jobs with optional state filter"""
+        """
+        Get list of jobs with optional state filter
+        
+        Optional limit/before page the list; before is "<created_at>|<id>" of
+        the last job on the previous page (its id breaks created_at ties
+        within a bulk enqueue). The JSON array is streamed row by row.
+        """
         state_str = request.args.get('state')
         state = JobState(state_str) if state_str else None
-        jobs = manager.list_jobs(state)
+        limit = request.args.get('limit', type=int)
+        before = request.args.get('before')
+        jobs = manager.iter_jobs(state, limit, before)
         
-        # Convert Job objects to dicts
-        job_dicts = []
-        for job in jobs:
-            job_dict = {
-                'id': job.id,
-                'command': job.command,
-                'state': job.state.value,
-                'priority': job.priority,
-                'attempts': job.attempts,
-                'max_retries': job.max_retries,
-                'created_at': job.created_at.isoformat() if job.created_at else None,
-                'updated_at': job.updated_at.isoformat() if job.updated_at else None,
-                'run_at': job.run_at.isoformat() if job.run_at else None,
-                'error_message': job.error_message,
-            }
-            job_dicts.append(job_dict)
+        def generate() -> Iterator[bytes]:
+            yield b'['
+            for i, job in enumerate(jobs):
+                yield (b',' if i else b'') + json_dumps_bytes(_job_to_api_dict(job))
+            yield b']'
         
-        return jsonify(job_dicts)
+        return Response(generate(), mimetype='application/json')
     
     @app.route('/api/metrics')
     def api_metrics() -> Any:
         """Get job metrics and statistics"""
-        metrics = manager.get_metrics()
-        return jsonify(metrics)
+        metrics = metrics_cache.get()
+        return _json(metrics)
     
     @app.route('/api/enqueue', methods=['POST'])
     def api_enqueue() -> Any:
@@ -65,7 +117,7 @@ def create_app(config_path: Optional[str] = None) -> Flask:
         data: Any = request.json
         
         if not data:
-            return jsonify({'error': 'No JSON data provided'}), 400
+            return _json({'error': 'No JSON data provided'}, 400)
         
         job_id = data.get('id')
         command = data.get('command')
@@ -74,48 +126,52 @@ def create_app(config_path: Optional[str] = None) -> Flask:
         run_at_str = data.get('run_at')
         
         if not job_id or not command:
-            return jsonify({'error': 'id and command are required'}), 400
+            return _json({'error': 'id and command are required'}, 400)
         
         run_at = None
         if run_at_str:
             try:
                 # Parse the datetime string (comes as local time from browser)
                 run_at_str = run_at_str.replace('Z', '')
-                local_dt = datetime.fromisoformat(run_at_str)
                 
                 # Convert local time to UTC (system stores/compares in UTC)
-                # Get local UTC offset
-                utc_offset_seconds = -time.timezone if time.daylight == 0 else -time.altzone
-                utc_offset = timedelta(seconds=utc_offset_seconds)
-                
-                # Subtract offset to get UTC time
-                run_at = local_dt - utc_offset
+                run_at = local_to_utc(datetime.fromisoformat(run_at_str))
             except ValueError:
-                return jsonify({'error': 'Invalid run_at format. Use ISO8601'}), 400
+                return _json({'error': 'Invalid run_at format. Use ISO8601'}, 400)
         
         try:
             job = manager.enqueue(job_id, command, max_retries, priority, run_at)
-            return jsonify({
+            invalidate_summaries()
+            return _json({
                 'success': True,
                 'job_id': job.id,
                 'message': f'Job {job.id} enqueued with priority {job.priority}'
             })
         except Exception as e:
-            return jsonify({'error': str(e)}), 500
+            return _json({'error': str(e)}, 500)
     
     @app.route('/api/retry/<job_id>', methods=['POST'])
     def api_retry(job_id: str) -> Any:
         """Retry a DLQ job"""
         try:
             manager.retry_dlq_job(job_id)
-            return jsonify({'success': True, 'message': f'Job {job_id} moved back to pending'})
+            invalidate_summaries()
+            return _json({'success': True, 'message': f'Job {job_id} moved back to pending'})
         except Exception as e:
-            return jsonify({'error': str(e)}), 500
+            return _json({'error': str(e)}, 500)
     
     return app
 
 
 def run_server(host: str = '127.0.0.1', port: int = 5000, debug: bool = False) -> None:
-    """Run the Flask development server"""
+    """Run the dashboard with waitress when installed, else the threaded Flask server"""
     app = create_app()
-    app.run(host=host, port=port, debug=debug)
+    if not debug:
+        try:
+            from waitress import serve
+        except ImportError:
+            pass
+        else:
+            serve(app, host=host, port=port, threads=8)
+            return
+    app.run(host=host, port=port, debug=debug, threaded=True)
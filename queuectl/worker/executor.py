@@ -1,40 +1,213 @@
 """Job executor with subprocess handling"""
 
+import os
+import secrets
+import selectors
+import shlex
+import shutil
+import signal
 import subprocess
-from typing import Tuple
+import threading
+import time
+from typing import IO, Callable, List, Optional, Tuple
+
+# Characters that need a shell to interpret (pipes, redirects, expansions, ...)
+_SHELL_CHARS = frozenset('|&;<>()$`\\*?[]#~{}!\n')
+
+# Only the end of stderr is kept for the error message
+_STDERR_TAIL_BYTES = 4096
+
+# (command, timeout) -> (exit code, stderr tail), or None on timeout
+Runner = Callable[[str, float], Optional[Tuple[int, bytes]]]
+
+
+def _direct_argv(command: str) -> Optional[List[str]]:
+    """Return argv to exec without a shell, or None if the command needs one"""
+    if os.name != 'posix' or _SHELL_CHARS.intersection(command):
+        return None
+    try:
+        argv = shlex.split(command)
+    except ValueError:
+        return None
+    # Builtins (exit, export, ...) and VAR=value prefixes still need the shell
+    if not argv or '=' in argv[0] or shutil.which(argv[0]) is None:
+        return None
+    return argv
+
+
+def _drain_tail(stream: IO[bytes], tail: bytearray) -> None:
+    """Read a stream to EOF, keeping only its last _STDERR_TAIL_BYTES"""
+    with stream:
+        for chunk in iter(lambda: stream.read(_STDERR_TAIL_BYTES), b''):
+            tail += chunk
+            del tail[:-_STDERR_TAIL_BYTES]
+
+
+class _PersistentShell:
+    """
+    A long-lived /bin/sh fed commands over stdin.
+
+    Each command runs in a ( subshell ), i.e. a plain fork of the already
+    loaded shell, so cd/export/exit stay isolated per job without paying
+    an exec of /bin/sh every time. A random end marker carries the exit code.
+
+    The shell leads its own process group, so the group holds only the
+    current job. After each job the shell signals the whole group, ending
+    anything the job left in the background before it could outlive the
+    job or write into the next job's stderr. The shell survives because
+    it traps TERM.
+    """
+
+    def __init__(self) -> None:
+        self._marker = f"__QC_DONE_{secrets.token_hex(8)}__"
+        self._process: Optional[subprocess.Popen] = None
+
+    def _shell(self) -> subprocess.Popen:
+        """Return the running shell, starting a new one if needed"""
+        if self._process is None or self._process.poll() is not None:
+            # Own session, so a timeout can kill the job's whole process group
+            self._process = subprocess.Popen(
+                ['/bin/sh'],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                start_new_session=True,
+            )
+            # A handler, not '' (ignore): ignored signals would be inherited
+            # by jobs, while handlers reset to the default in subshells
+            assert self._process.stdin is not None
+            self._process.stdin.write(b"trap : TERM\n")
+        return self._process
+
+    def run(self, command: str, timeout: float) -> Optional[Tuple[int, bytes]]:
+        """Run a command, returning (exit code, stderr tail) or None on timeout"""
+        process = self._shell()
+        assert process.stdin is not None and process.stdout is not None
+        # eval keeps syntax errors inside the subshell; the job's stderr goes
+        # to our pipe, its stdout and stdin to /dev/null. Leftover background
+        # processes are killed before the marker, so none can write after it
+        process.stdin.write(
+            f"( eval {shlex.quote(command)} ) </dev/null 2>&1 >/dev/null; "
+            f"_qc_status=$?; kill -TERM 0 2>/dev/null; "
+            f"printf '\\n{self._marker} %d\\n' \"$_qc_status\"\n".encode()
+        )
+        process.stdin.flush()
+
+        marker = f"\n{self._marker} ".encode()
+        keep = _STDERR_TAIL_BYTES + len(marker) + 16
+        fd = process.stdout.fileno()
+        buf = bytearray()
+        deadline = time.monotonic() + timeout
+        with selectors.DefaultSelector() as selector:
+            selector.register(fd, selectors.EVENT_READ)
+            while True:
+                start = buf.find(marker)
+                end = buf.find(b'\n', start + len(marker)) if start != -1 else -1
+                if end != -1:
+                    code = int(buf[start + len(marker):end])
+                    return code, bytes(buf[:start][-_STDERR_TAIL_BYTES:])
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not selector.select(remaining):
+                    self.close()
+                    return None
+                chunk = os.read(fd, 65536)
+                if not chunk:
+                    self.close()
+                    raise RuntimeError("Persistent shell exited unexpectedly")
+                buf += chunk
+                if len(buf) > 2 * keep:
+                    del buf[:-keep]
+
+    def close(self) -> None:
+        """Kill the shell and anything still running in its process group"""
+        process, self._process = self._process, None
+        if process is None:
+            return
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        process.wait()
+        for stream in (process.stdin, process.stdout):
+            if stream is not None:
+                stream.close()
 
 
 class JobExecutor:
     """Executes job commands via subprocess"""
 
-    def __init__(self, timeout: int = 300):
+    def __init__(self, timeout: int = 300, persistent_shell: bool = True,
+                 runner: Optional[Runner] = None):
         self.timeout = timeout
+        # Replaces process creation entirely when given (e.g. a fake in tests)
+        self._runner = runner
+        # Commands that need a shell reuse one per executor on POSIX
+        self._shell: Optional[_PersistentShell] = None
+        if persistent_shell and os.name == 'posix' and os.path.exists('/bin/sh'):
+            self._shell = _PersistentShell()
+
+    def close(self) -> None:
+        """Stop the persistent shell, if one was started"""
+        if self._shell is not None:
+            self._shell.close()
 
     def execute(self, command: str) -> Tuple[bool, str]:
         """
         Execute shell command, return (success, error_msg)
         Exit code 0 = success, non-zero = failure
         """
+        if self._runner is not None:
+            return self._run_with(self._runner, command)
+        argv = _direct_argv(command)
+        if argv is None and self._shell is not None:
+            return self._run_with(self._shell.run, command)
         try:
-            result = subprocess.run(
-                command,
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=self.timeout
+            # stdout is discarded and stderr streamed into a bounded buffer,
+            # so noisy jobs cost constant memory
+            process = subprocess.Popen(
+                argv if argv is not None else command,
+                shell=argv is None,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
             )
-            
-            if result.returncode == 0:
-                return True, ""
-            else:
-                stderr = result.stderr.strip() if result.stderr else f"Exit code {result.returncode}"
-                return False, f"Exit code {result.returncode}: {stderr}"
-        
+        except FileNotFoundError:
+            return False, "Command not found"
+        except Exception as e:
+            return False, str(e)
+
+        assert process.stderr is not None
+        tail = bytearray()
+        reader = threading.Thread(target=_drain_tail, args=(process.stderr, tail), daemon=True)
+        reader.start()
+
+        try:
+            returncode = process.wait(timeout=self.timeout)
         except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+            reader.join(timeout=1)
             return False, f"Command timeout after {self.timeout}s"
-        
+        reader.join()
+
+        return self._result(returncode, bytes(tail))
+
+    def _run_with(self, runner: Runner, command: str) -> Tuple[bool, str]:
+        """Run a command through a Runner such as the persistent shell"""
+        try:
+            result = runner(command, self.timeout)
         except FileNotFoundError:
             return False, "Command not found"
-        
         except Exception as e:
             return False, str(e)
+        if result is None:
+            return False, f"Command timeout after {self.timeout}s"
+        return self._result(*result)
+
+    @staticmethod
+    def _result(returncode: int, stderr_tail: bytes) -> Tuple[bool, str]:
+        """Build the (success, error_msg) pair from an exit code and stderr tail"""
+        if returncode == 0:
+            return True, ""
+        stderr = stderr_tail.decode(errors='replace').strip() or f"Exit code {returncode}"
+        return False, f"Exit code {returncode}: {stderr}"
@@ -1,28 +1,43 @@
 """Worker pool with multiprocessing and health monitoring"""
 
 import multiprocessing as mp
-from multiprocessing.synchronize import Event as EventType
+from multiprocessing.process import BaseProcess
+from multiprocessing.synchronize import Event as EventType, Semaphore as SemaphoreType
 import os
 import signal
 import time
+from logging.handlers import QueueListener
 from pathlib import Path
 from typing import List, Optional, Any
 from datetime import datetime
 
 from queuectl.config import Config
 from queuectl.queue import QueueManager
-from queuectl.utils import setup_logger
+from queuectl.utils import setup_logger, start_log_listener
 from queuectl.worker.executor import JobExecutor
 
+# Seconds between metric pruning passes in the pool parent
+_MAINTENANCE_INTERVAL = 3600.0
 
-def _worker_loop_func(worker_id: int, shutdown_event: EventType) -> None:
+# Seconds without a heartbeat before an idle worker counts as dead; a busy
+# worker gets its job timeout on top of this
+_HEARTBEAT_GRACE = 60.0
+
+
+def _worker_loop_func(worker_id: int, shutdown_event: EventType, wake: SemaphoreType,
+                      heartbeats: Any, jobs_processed: Any, busy_since: Any,
+                      log_queue: Any = None, queue_manager: Optional[QueueManager] = None) -> None:
     """Module-level worker function to avoid pickle issues with bound methods"""
-    # Recreate QueueManager and Config in worker process
-    config = Config.load()
-    queue_manager = QueueManager(config=config)
+    if queue_manager is not None:
+        # Forked: reuse the parent's manager (storage reconnects after fork)
+        config = queue_manager.config
+    else:
+        # Spawned: recreate QueueManager and Config; requeued jobs wake idle siblings
+        config = Config.load()
+        queue_manager = QueueManager(config=config, notify=wake.release)
     
-    logger = setup_logger(f"worker-{worker_id}")
-    executor = JobExecutor(timeout=config.job_timeout)
+    # Records go to the pool's listener thread, which does formatting and file IO
+    logger = setup_logger(f"worker-{worker_id}", log_queue)
 
     # Setup signal handlers
     signal.signal(signal.SIGINT, lambda s, f: shutdown_event.set())
@@ -30,72 +45,61 @@ def _worker_loop_func(worker_id: int, shutdown_event: EventType) -> None:
     
     logger.info(f"Worker {worker_id} started (PID: {os.getpid()})")
 
-    while not shutdown_event.is_set():
-        try:
-            job = queue_manager.claim_job()
-
-            if not job:
-                time.sleep(config.worker_poll_interval)
-                continue
-
-            logger.info(f"Processing job {job.id}: {job.command}")
-            success, error = executor.execute(job.command)
-
-            if success:
-                queue_manager.mark_completed(job.id)
-                logger.info(f"Job {job.id} completed successfully")
-            else:
-                job.attempts += 1
-                logger.warning(f"Job {job.id} failed: {error} (attempt {job.attempts}/{job.max_retries})")
-
-                if job.should_retry():
-                    backoff = job.calculate_backoff(config.backoff_base)
-                    logger.info(f"Retrying job {job.id} after {backoff}s backoff")
-                    time.sleep(backoff)
-                    queue_manager.mark_pending(job.id, job.attempts, error)
+    executor = JobExecutor(timeout=config.job_timeout)
+    # The persistent shell (and anything its jobs left running) must not
+    # outlive the worker, however the loop ends
+    try:
+        while not shutdown_event.is_set():
+            # Only this worker writes its slots, so plain stores need no lock
+            heartbeats[worker_id] = time.time()
+            try:
+                job = queue_manager.claim_job()
+
+                if not job:
+                    # Block until woken by new work or shutdown, polling as a fallback
+                    # for jobs enqueued from other processes (CLI, web dashboard)
+                    wake.acquire(timeout=config.worker_poll_interval)
+                    continue
+
+                logger.info(f"Processing job {job.id}: {job.command}")
+                # No heartbeats while the job runs; health checks allow for the
+                # job timeout from this stamp instead
+                busy_since[worker_id] = time.time()
+                try:
+                    success, error = executor.execute(job.command)
+                finally:
+                    busy_since[worker_id] = 0.0
+                heartbeats[worker_id] = time.time()
+
+                if success:
+                    queue_manager.mark_completed(job.id)
+                    logger.info(f"Job {job.id} completed successfully")
                 else:
-                    logger.error(f"Job {job.id} moved to DLQ after {job.attempts} failed attempts")
-                    queue_manager.mark_dead(job.id, job.attempts, error)
-                    
-        except KeyboardInterrupt:
-            logger.info("Received shutdown signal")
-            break
-        except Exception as e:
-            logger.error(f"Unexpected worker error: {e}", exc_info=True)
-            time.sleep(1)
-
+                    job.attempts += 1
+                    logger.warning(f"Job {job.id} failed: {error} (attempt {job.attempts}/{job.max_retries})")
+
+                    if job.should_retry():
+                        backoff = job.calculate_backoff(config.backoff_base)
+                        logger.info(f"Retrying job {job.id} after {backoff}s backoff")
+                        time.sleep(backoff)
+                        queue_manager.mark_pending(job.id, job.attempts, error)
+                    else:
+                        logger.error(f"Job {job.id} moved to DLQ after {job.attempts} failed attempts")
+                        queue_manager.mark_dead(job.id, job.attempts, error)
+
+                jobs_processed[worker_id] += 1
+                        
+            except KeyboardInterrupt:
+                logger.info("Received shutdown signal")
+                break
+            except Exception as e:
+                logger.error(f"Unexpected worker error: {e}", exc_info=True)
+                time.sleep(1)
+    finally:
+        executor.close()
     logger.info(f"Worker {worker_id} shutting down gracefully")
 
 
-class WorkerHealthMonitor:
-    """Monitors worker health with heartbeat tracking"""
-    
-    def __init__(self, worker_id: int, queue_manager: QueueManager):
-        self.worker_id = worker_id
-        self.queue_manager = queue_manager
-        self.last_heartbeat = mp.Value('d', time.time())
-        self.jobs_processed = mp.Value('i', 0)
-    
-    def heartbeat(self) -> None:
-        """Update heartbeat timestamp"""
-        with self.last_heartbeat.get_lock():
-            self.last_heartbeat.value = time.time()
-    
-    def increment_jobs(self) -> None:
-        """Increment processed jobs counter"""
-        with self.jobs_processed.get_lock():
-            self.jobs_processed.value += 1
-    
-    def get_stats(self) -> dict:
-        """Get worker statistics"""
-        return {
-            'worker_id': self.worker_id,
-            'last_heartbeat': self.last_heartbeat.value,
-            'jobs_processed': self.jobs_processed.value,
-            'alive': time.time() - self.last_heartbeat.value < 60
-        }
-
-
 class WorkerPool:
     """Manages multiple worker processes with health monitoring"""
 
@@ -103,23 +107,46 @@ class WorkerPool:
         self.queue_manager = queue_manager
         self.config = config
         self.count = count
-        self.processes: List[mp.Process] = []
-        self.health_monitors: List[WorkerHealthMonitor] = []
-        self.shutdown_event = mp.Event()
+        self.processes: List[BaseProcess] = []
+        # Fork where available so workers inherit the initialized manager
+        # instead of each reloading config and re-running the schema setup
+        self._ctx = mp.get_context('fork' if 'fork' in mp.get_all_start_methods() else None)
+        self.shutdown_event = self._ctx.Event()
+        # Released when work becomes pending (or on stop) so idle workers don't wait out the poll interval
+        self.wake = self._ctx.Semaphore(0)
+        # Workers enqueue log records; one listener thread in this process writes them
+        self.log_queue = self._ctx.Queue(-1)
+        # Per-worker health as shared arrays; one snapshot reads every worker
+        # without taking any semaphores
+        self.heartbeats = self._ctx.RawArray('d', [time.time()] * count)
+        self.jobs_processed = self._ctx.RawArray('l', count)
+        # When each worker's current job started, or 0.0 while it is idle
+        self.busy_since = self._ctx.RawArray('d', count)
+        self._log_listener: Optional[QueueListener] = None
+        self.queue_manager.notify = self.wake.release
 
     def start(self, daemon: bool = False) -> None:
         """Start worker processes with health monitoring"""
         if daemon:
             self._write_pid_file()
 
+        forked = self._ctx.get_start_method() == 'fork'
         for i in range(self.count):
             # Use module-level function to avoid pickling self
-            p = mp.Process(target=_worker_loop_func, args=(i, self.shutdown_event), daemon=daemon)
+            args: tuple = (i, self.shutdown_event, self.wake, self.heartbeats,
+                           self.jobs_processed, self.busy_since, self.log_queue)
+            if forked:
+                args += (self.queue_manager,)
+            p = self._ctx.Process(target=_worker_loop_func, args=args, daemon=daemon)
             p.start()
             self.processes.append(p)
 
+        # Started after forking so no child inherits a half-held listener thread
+        self._log_listener = start_log_listener(self.log_queue, [f"worker-{i}" for i in range(self.count)])
+
         if not daemon:
             self._wait_for_workers()
+            self._stop_log_listener()
 
     def _write_pid_file(self) -> None:
         """Write worker PIDs to file for later shutdown"""
@@ -132,19 +159,40 @@ class WorkerPool:
                 f.write(f"{p.pid}\n")
 
     def _wait_for_workers(self) -> None:
-        """Wait for all workers to complete"""
+        """Wait for all workers to complete, running maintenance in between"""
         try:
+            next_maintenance = time.monotonic()
             for p in self.processes:
-                p.join()
+                while p.exitcode is None:
+                    if time.monotonic() >= next_maintenance:
+                        self._run_maintenance()
+                        next_maintenance = time.monotonic() + _MAINTENANCE_INTERVAL
+                    p.join(timeout=next_maintenance - time.monotonic())
         except KeyboardInterrupt:
             self.stop()
 
+    def _run_maintenance(self) -> None:
+        """Prune old metric events (parent only, so workers never contend for it)"""
+        if self.config.metrics_retention_days <= 0:
+            return
+        
+        logger = setup_logger("pool")
+        try:
+            removed = self.queue_manager.prune_metrics(self.config.metrics_retention_days)
+            if removed:
+                logger.info(f"Pruned {removed} metric event(s) older than "
+                            f"{self.config.metrics_retention_days} days")
+        except Exception as e:
+            logger.error(f"Metrics maintenance failed: {e}")
+
     def stop(self) -> None:
         """Signal all workers to stop gracefully"""
         logger = setup_logger("pool")
         logger.info(f"Stopping {len(self.processes)} worker(s)...")
         
         self.shutdown_event.set()
+        for _ in self.processes:
+            self.wake.release()
         
         for i, p in enumerate(self.processes):
             p.join(timeout=30)
@@ -156,10 +204,38 @@ class WorkerPool:
                     logger.error(f"Worker {i} did not terminate, killing...")
                     p.kill()
         
+        self._stop_log_listener()
         logger.info("All workers stopped")
+
+    def _stop_log_listener(self) -> None:
+        """Flush queued worker log records and stop the listener thread"""
+        if self._log_listener is not None:
+            self._log_listener.stop()
+            for handler in self._log_listener.handlers:
+                handler.close()
+            self._log_listener = None
     
     def get_health_status(self) -> List[dict]:
-        """Get health status of all workers"""
-        return [monitor.get_stats() for monitor in self.health_monitors]
+        """
+        Get health status of all workers
+        
+        A worker running a job is alive until the job could have outlived its
+        timeout; an idle one must have heartbeat within _HEARTBEAT_GRACE.
+        """
+        now = time.time()
+        heartbeats = self.heartbeats[:]
+        jobs_processed = self.jobs_processed[:]
+        busy_since = self.busy_since[:]
+        busy_limit = self.config.job_timeout + _HEARTBEAT_GRACE
+        return [
+            {
+                'worker_id': i,
+                'last_heartbeat': heartbeat,
+                'jobs_processed': jobs,
+                'busy_since': busy or None,
+                'alive': now - busy < busy_limit if busy else now - heartbeat < _HEARTBEAT_GRACE,
+            }
+            for i, (heartbeat, jobs, busy) in enumerate(zip(heartbeats, jobs_processed, busy_since))
+        ]
 
 
@@ -8,6 +8,10 @@ setup(
         "click>=8.0.0",
         "flask>=2.0.0",
     ],
+    extras_require={
+        'fast': ['orjson>=3.8.0'],
+        'web': ['waitress>=2.1.0'],
+    },
     entry_points={
         'console_scripts': [
             'queuectl=queuectl.cli:cli',
@@ -0,0 +1,120 @@
+"""Shared test fixtures"""
+
+import shutil
+from datetime import datetime
+
+import pytest
+
+from queuectl.config import Config
+from queuectl.queue import QueueManager
+from queuectl.utils import serialization
+
+
+def pytest_addoption(parser):
+    parser.addoption("--runslow", action="store_true", help="also run tests marked slow")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: waits on real process timeouts; needs --runslow")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--runslow"):
+        return
+    skip_slow = pytest.mark.skip(reason="slow; run with --runslow")
+    for item in items:
+        if "slow" in item.keywords:
+            item.add_marker(skip_slow)
+
+
+@pytest.fixture(autouse=True)
+def isolated_config_file(tmp_path, monkeypatch):
+    """Point Config at a per-test config file so parallel runs never share one"""
+    monkeypatch.setattr(Config, "CONFIG_FILE", tmp_path / "config.json")
+    Config.clear_cache()
+    yield
+    Config.clear_cache()
+
+
+@pytest.fixture(params=[True, False], ids=["orjson", "stdlib"])
+def encoder(request, monkeypatch):
+    """Run the test with orjson and again with the stdlib json fallback"""
+    if request.param and not serialization.HAS_ORJSON:
+        pytest.skip("orjson not installed")
+    monkeypatch.setattr(serialization, "HAS_ORJSON", request.param)
+
+
+def _test_config(db_path: str) -> Config:
+    """Build the configuration shared by the queue manager fixtures"""
+    return Config(
+        max_retries=3,
+        backoff_base=2.0,
+        db_path=db_path,
+        worker_poll_interval=0.1,
+        job_timeout=5
+    )
+
+
+@pytest.fixture(scope="session")
+def golden_db(tmp_path_factory):
+    """An empty database with the current schema, built once per session"""
+    path = tmp_path_factory.mktemp("schema") / "golden.db"
+    QueueManager(_test_config(str(path))).storage.close()
+    return path
+
+
+@pytest.fixture
+def db_path(tmp_path, golden_db):
+    """Path to a private copy of the golden database"""
+    # The copy carries the schema version, so opening it skips all DDL
+    path = tmp_path / "test.db"
+    shutil.copyfile(golden_db, path)
+    return str(path)
+
+
+@pytest.fixture
+def manager():
+    """Queue manager on a private in-memory database"""
+    # Each :memory: connection is its own database, so tests stay isolated
+    # without touching the filesystem or creating journal files
+    manager = QueueManager(_test_config(":memory:"))
+    yield manager
+    manager.storage.close()
+
+
+@pytest.fixture(scope="module")
+def _module_manager():
+    """One in-memory queue manager for a whole test module"""
+    manager = QueueManager(_test_config(":memory:"))
+    yield manager
+    manager.storage.close()
+
+
+@pytest.fixture
+def module_manager(_module_manager):
+    """
+    The module's queue manager, emptied again after each test
+    
+    For modules whose tests don't depend on each other; saves building a
+    fresh schema per test.
+    """
+    yield _module_manager
+    _module_manager.notify = None
+    _module_manager.clock = datetime.utcnow
+    with _module_manager.storage._transaction() as conn:
+        # The counts and rollup triggers keep job_state_counts in step with
+        # the jobs delete; rollup totals are kept through deletes, so zero them
+        conn.execute("DELETE FROM jobs")
+        conn.execute("DELETE FROM job_metrics")
+        conn.execute("UPDATE metric_rollup SET n = 0, timed = 0, sum_duration_ms = 0")
+
+
+@pytest.fixture
+def file_manager(db_path):
+    """Queue manager on an on-disk database, for tests that reopen it or need real SQLite locking"""
+    manager = QueueManager(_test_config(db_path))
+    yield manager
+    # Restart tests leave a second manager open on the file, so the WAL
+    # isn't removed on close; truncate it explicitly
+    manager.storage.checkpoint()
+    manager.storage.close()
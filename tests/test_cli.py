@@ -0,0 +1,202 @@
+"""Tests for the Click command line interface"""
+
+import sys
+from typing import List, Tuple
+
+import click
+import pytest
+from click.testing import CliRunner
+
+from queuectl.cli import cli
+from queuectl.config import Config
+from queuectl.queue import QueueManager
+from queuectl.utils import json_loads
+
+
+@pytest.fixture
+def runner(db_path):
+    """CliRunner whose config points at a private copy of the golden database"""
+    Config(db_path=db_path).save()
+    return CliRunner()
+
+
+@pytest.fixture
+def exiting_commands(monkeypatch):
+    """Register commands that leave through ctx.exit() and sys.exit()"""
+    monkeypatch.setitem(cli.commands, 'ctx-exit', click.Command(
+        'ctx-exit', callback=lambda: click.get_current_context().exit(3)))
+    monkeypatch.setitem(cli.commands, 'sys-exit', click.Command(
+        'sys-exit', callback=lambda: sys.exit(4)))
+
+
+def _blocks(output):
+    """Split batch output into (exit code, output lines) per command"""
+    blocks: List[Tuple[int, List[str]]] = []
+    lines: List[str] = []
+    for line in output.splitlines():
+        if line.startswith("---END--- "):
+            blocks.append((int(line.split()[1]), lines))
+            lines = []
+        else:
+            lines.append(line)
+    return blocks
+
+
+class TestBatch:
+    """Tests for `queuectl batch`"""
+    
+    def test_marker_after_each_command(self, runner):
+        """Each command's output is followed by its own end marker"""
+        result = runner.invoke(cli, ['batch'], input="status\n\nconfig get max-retries\n")
+        
+        blocks = _blocks(result.output)
+        assert result.exit_code == 0
+        assert [code for code, _ in blocks] == [0, 0]
+        assert blocks[0][1][0] == "=== Queue Status ==="
+        assert blocks[1][1] == ["max-retries = 3"]
+    
+    def test_usage_error_reports_code_and_continues(self, runner):
+        """Unknown commands and bad options return 2 without ending the batch"""
+        result = runner.invoke(cli, ['batch'], input="nope\nlist --state bogus\nstatus\n")
+        
+        assert [code for code, _ in _blocks(result.output)] == [2, 2, 0]
+        assert "No such command 'nope'" in result.stderr
+    
+    def test_parse_error_reports_code_and_continues(self, runner):
+        """Lines shlex cannot split are reported with code 2"""
+        result = runner.invoke(cli, ['batch'], input='list "unclosed\nstatus\n')
+        
+        assert [code for code, _ in _blocks(result.output)] == [2, 0]
+        assert "No closing quotation" in result.stderr
+    
+    def test_nonzero_exits_are_reported(self, runner, exiting_commands):
+        """ctx.exit(n) and sys.exit(n) become the marker's code, not the batch's"""
+        result = runner.invoke(cli, ['batch'], input="ctx-exit\nsys-exit\nstatus\n")
+        
+        assert result.exit_code == 0
+        assert [code for code, _ in _blocks(result.output)] == [3, 4, 0]
+
+
+class TestConfigScript:
+    """Tests for `queuectl config script`"""
+    
+    def test_one_block_per_command(self, runner):
+        """set/get/set print three blocks, each ending in its exit code"""
+        result = runner.invoke(cli, ['config', 'script', '-'],
+                               input="set max-retries 5\nget max-retries\nset max-retries 3\n")
+        
+        assert result.exit_code == 0
+        assert _blocks(result.output) == [
+            (0, ["Set max-retries = 5"]),
+            (0, ["max-retries = 5"]),
+            (0, ["Set max-retries = 3"]),
+        ]
+        assert Config.load().max_retries == 3
+    
+    def test_reads_commands_from_file(self, runner, tmp_path):
+        """A script file runs the same as stdin, with blank lines skipped"""
+        script = tmp_path / "config.txt"
+        script.write_text("set max-retries 7\n\nget max-retries\n")
+        
+        result = runner.invoke(cli, ['config', 'script', str(script)])
+        
+        assert _blocks(result.output) == [(0, ["Set max-retries = 7"]), (0, ["max-retries = 7"])]
+
+
+@pytest.fixture
+def broken_runner(tmp_path):
+    """CliRunner whose database path cannot be opened"""
+    Config(db_path=str(tmp_path / "missing" / "queue.db")).save()
+    return CliRunner()
+
+
+class TestSelfCheck:
+    """Tests for `queuectl self-check`"""
+    
+    def test_all_commands_ok(self, runner):
+        """Every read-only command reports OK and the exit code is 0"""
+        result = runner.invoke(cli, ['self-check'])
+        
+        assert result.exit_code == 0
+        assert result.output.splitlines() == [
+            "--help=OK", "status=OK", "list=OK", "config get=OK", "dlq list=OK",
+        ]
+    
+    def test_failures_reported_with_reason(self, broken_runner):
+        """Commands that print errors fail with their last stderr line"""
+        result = broken_runner.invoke(cli, ['self-check'])
+        
+        checks = dict(line.split("=", 1) for line in result.output.splitlines())
+        assert result.exit_code == 1
+        assert checks["config get"] == "OK"
+        assert checks["status"] == "FAIL:Error: unable to open database file"
+    
+    def test_failure_inside_batch_continues(self, broken_runner):
+        """A failing self-check ends with its marker and later lines still run"""
+        result = broken_runner.invoke(cli, ['batch'], input="self-check\nconfig get max-retries\n")
+        
+        blocks = _blocks(result.output)
+        assert result.exit_code == 0
+        assert [code for code, _ in blocks] == [1, 0]
+        assert blocks[1][1] == ["max-retries = 3"]
+
+
+# Fields every job object in list/dlq list JSON output carries
+_JOB_KEYS = {
+    'id', 'command', 'state', 'attempts', 'max_retries', 'priority', 'run_at',
+    'created_at', 'updated_at', 'error_message', 'last_executed_at',
+}
+
+
+class TestJsonOutput:
+    """Tests for the global `--output json` option"""
+    
+    def _json(self, runner, args):
+        result = runner.invoke(cli, ['--output', 'json'] + args)
+        assert result.exit_code == 0, result.output
+        return json_loads(result.output)
+    
+    def test_list(self, runner):
+        """list prints a JSON array of job objects"""
+        runner.invoke(cli, ['enqueue', '{"id": "job1", "command": "true", "priority": 8}'])
+        
+        jobs = self._json(runner, ['list'])
+        assert [job['id'] for job in jobs] == ["job1"]
+        assert set(jobs[0]) == _JOB_KEYS
+        assert (jobs[0]['state'], jobs[0]['priority']) == ("pending", 8)
+    
+    def test_list_empty(self, runner):
+        """An empty queue is an empty array, not a message"""
+        assert self._json(runner, ['list']) == []
+    
+    def test_dlq_list(self, runner):
+        """dlq list prints dead jobs with their error"""
+        manager = QueueManager(Config.load())
+        manager.enqueue("job1", "false")
+        manager.claim_job()
+        manager.mark_dead("job1", 1, "boom")
+        manager.storage.close()
+        
+        jobs = self._json(runner, ['dlq', 'list'])
+        assert [job['id'] for job in jobs] == ["job1"]
+        assert set(jobs[0]) == _JOB_KEYS
+        assert (jobs[0]['state'], jobs[0]['error_message']) == ("dead", "boom")
+    
+    def test_config_get_all(self, runner):
+        """config get prints every setting under its hyphenated name"""
+        data = self._json(runner, ['config', 'get'])
+        assert set(data) == {field.replace('_', '-') for field in Config().to_dict()}
+        assert data['max-retries'] == 3
+    
+    def test_config_get_hyphenated_key(self, runner):
+        """A hyphenated key is looked up and echoed back under the same name"""
+        assert self._json(runner, ['config', 'get', 'max-retries']) == {'max-retries': 3}
+    
+    @pytest.mark.usefixtures("encoder")
+    def test_output_is_compact_with_either_encoder(self, runner):
+        """orjson and the stdlib fallback print the same compact bytes"""
+        status = runner.invoke(cli, ['--output', 'json', 'status'])
+        config_get = runner.invoke(cli, ['--output', 'json', 'config', 'get', 'max-retries'])
+        
+        assert status.output == '{"pending":0,"processing":0,"completed":0,"failed":0,"dead":0}\n'
+        assert config_get.output == '{"max-retries":3}\n'
@@ -2,37 +2,36 @@
 Tests for transaction isolation and concurrency
 """
 
+import asyncio
+import os
 import pytest
+import queue
+import sqlite3
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import List
 
 from queuectl.config import Config
 from queuectl.queue import QueueManager
 from queuectl.models import JobState
 
 
-def test_concurrent_job_claiming(tmp_path):
+def test_concurrent_job_claiming(file_manager):
     """Test that concurrent workers don't claim the same job"""
-    db_path = tmp_path / "test.db"
-    config = Config(db_path=str(db_path))
-    manager = QueueManager(config)
     
     # Enqueue 5 jobs
-    for i in range(5):
-        manager.enqueue(f"job{i}", f"echo {i}")
+    file_manager.enqueue_many([{'id': f"job{i}", 'command': f"echo {i}"} for i in range(5)])
     
-    claimed_jobs = []
-    lock = threading.Lock()
+    claimed_q: queue.SimpleQueue = queue.SimpleQueue()
     
     def claim_worker():
         """Worker that tries to claim jobs"""
         for _ in range(3):
-            job = manager.claim_job()
+            job = file_manager.claim_job()
             if job:
-                with lock:
-                    claimed_jobs.append(job.id)
-            time.sleep(0.01)
+                claimed_q.put(job.id)
     
     # Start 3 concurrent workers
     threads = []
@@ -45,16 +44,15 @@ def test_concurrent_job_claiming(tmp_path):
     for t in threads:
         t.join()
     
+    claimed_jobs = [claimed_q.get() for _ in range(claimed_q.qsize())]
+    
     # Verify no duplicate claims
     assert len(claimed_jobs) == len(set(claimed_jobs)), "Jobs were claimed multiple times"
     assert len(claimed_jobs) == 5, "Not all jobs were claimed"
 
 
-def test_transaction_rollback_on_error(tmp_path):
+def test_transaction_rollback_on_error(manager):
     """Test that failed transactions roll back properly"""
-    db_path = tmp_path / "test.db"
-    config = Config(db_path=str(db_path))
-    manager = QueueManager(config)
     
     manager.enqueue("job1", "echo test")
     
@@ -75,15 +73,12 @@ def test_transaction_rollback_on_error(tmp_path):
     assert job.state == JobState.PENDING, "Transaction did not roll back"
 
 
-def test_immediate_lock_acquisition(tmp_path):
+def test_immediate_lock_acquisition(file_manager):
     """Test that BEGIN IMMEDIATE acquires write lock immediately"""
-    db_path = tmp_path / "test.db"
-    config = Config(db_path=str(db_path))
-    manager = QueueManager(config)
     
-    manager.enqueue("job1", "echo test")
+    file_manager.enqueue("job1", "echo test")
     
-    storage = manager.storage
+    storage = file_manager.storage
     results = []
     
     def transaction_with_delay():
@@ -122,40 +117,117 @@ def test_immediate_lock_acquisition(tmp_path):
     assert results.index("first") < results.index("second"), "Transactions executed out of order"
 
 
-def test_high_concurrency_stress(tmp_path):
+@pytest.fixture(scope="module")
+def claim_pool():
+    """Ten claim threads shared by the module's stress tests"""
+    with ThreadPoolExecutor(max_workers=10) as pool:
+        yield pool
+
+
+def test_high_concurrency_stress(file_manager, claim_pool):
     """Stress test with many concurrent workers"""
-    db_path = tmp_path / "test.db"
-    config = Config(db_path=str(db_path))
-    manager = QueueManager(config)
-    
     # Enqueue 20 jobs
     num_jobs = 20
-    for i in range(num_jobs):
-        manager.enqueue(f"job{i}", f"echo {i}")
+    file_manager.enqueue_many([{'id': f"job{i}", 'command': f"echo {i}"} for i in range(num_jobs)])
     
-    claimed = []
-    lock = threading.Lock()
-    
-    def aggressive_worker():
-        """Worker that aggressively claims jobs"""
+    async def aggressive_worker(loop):
+        """Worker that aggressively claims batches of jobs until none are left"""
+        claimed: List[str] = []
         while True:
-            job = manager.claim_job()
-            if job:
-                with lock:
-                    claimed.append(job.id)
-            else:
-                break
+            jobs = await loop.run_in_executor(claim_pool, file_manager.claim_jobs, 4)
+            if not jobs:
+                return claimed
+            claimed.extend(job.id for job in jobs)
     
-    # Start 10 concurrent workers
-    threads = []
-    for _ in range(10):
-        t = threading.Thread(target=aggressive_worker)
-        threads.append(t)
-        t.start()
+    async def run_workers():
+        loop = asyncio.get_running_loop()
+        # 10 concurrent workers on reused pool threads
+        results = await asyncio.gather(*[aggressive_worker(loop) for _ in range(10)])
+        return [job_id for claimed in results for job_id in claimed]
     
-    for t in threads:
-        t.join(timeout=5)
+    claimed = asyncio.run(asyncio.wait_for(run_workers(), timeout=5))
     
     # Verify all jobs claimed exactly once
     assert len(claimed) == num_jobs
     assert len(set(claimed)) == num_jobs, "Duplicate job claims detected"
+
+
+def test_wal_journal_mode_enabled(file_manager):
+    """Test that the database is switched to WAL so readers don't block on writers"""
+    storage = file_manager.storage
+    
+    with storage._transaction() as writer, storage._read_conn() as reader:
+        for conn in (writer, reader):
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+            assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 30000
+            assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2  # MEMORY
+            assert conn.execute("PRAGMA cache_size").fetchone()[0] == -65536
+
+
+def test_checkpoint_truncates_wal(file_manager):
+    """Test checkpoint() empties the -wal file while other connections stay open"""
+    file_manager.enqueue_many([{'id': f"job{i}", 'command': "true"} for i in range(50)])
+    with file_manager.storage._read_conn():
+        pass
+    wal = Path(file_manager.config.db_path + "-wal")
+    assert wal.stat().st_size > 0
+    
+    file_manager.storage.checkpoint()
+    assert wal.stat().st_size == 0
+    assert file_manager.get_stats()['pending'] == 50
+
+
+def test_read_pool_reuses_readonly_connections(tmp_path):
+    """Test that readers share pooled read-only connections separate from the writer"""
+    config = Config(db_path=str(tmp_path / "test.db"))
+    storage = QueueManager(config).storage
+    
+    with storage._read_conn() as first:
+        pass
+    with storage._read_conn() as second:
+        # A released connection is handed to the next reader
+        assert second is first
+        with pytest.raises(sqlite3.OperationalError, match="readonly"):
+            second.execute("DELETE FROM jobs")
+    
+    with storage._transaction() as writer:
+        assert writer is not first
+
+
+def test_reads_proceed_during_write_transaction(file_manager):
+    """Test pooled readers see committed data while a writer holds its transaction"""
+    file_manager.enqueue("job1", "echo 1")
+    
+    with file_manager.storage._transaction() as conn:
+        conn.execute("UPDATE jobs SET state = 'processing' WHERE id = 'job1'")
+        # Another thread reads without waiting for the writer lock
+        seen = []
+        reader = threading.Thread(target=lambda: seen.append(
+            (file_manager.get_job("job1").state, file_manager.get_stats()['pending'])))
+        reader.start()
+        reader.join(timeout=5)
+        assert seen == [(JobState.PENDING, 1)]
+    
+    assert file_manager.get_job("job1").state == JobState.PROCESSING
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+def test_forked_child_opens_its_own_connections(tmp_path):
+    """Test that a forked worker drops inherited SQLite handles and reconnects"""
+    config = Config(db_path=str(tmp_path / "test.db"))
+    manager = QueueManager(config)
+    manager.enqueue("job1", "echo 1")
+    parent_writer = manager.storage._writer
+    
+    pid = os.fork()
+    if pid == 0:
+        ok = manager.storage._writer is None and manager.claim_job() is not None
+        os._exit(0 if ok and manager.storage._writer is not parent_writer else 1)
+    _, status = os.waitpid(pid, 0)
+    
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert manager.get_job("job1").state == JobState.PROCESSING
+    # The parent's own connection is untouched and still usable
+    manager.enqueue("job2", "echo 2")
+    assert manager.storage._writer is parent_writer
@@ -2,8 +2,6 @@
 
 import pytest
 import time
-import tempfile
-from pathlib import Path
 
 from queuectl.config import Config
 from queuectl.models import JobState
@@ -11,16 +9,14 @@ from queuectl.queue import QueueManager
 
 
 @pytest.fixture
-def test_config():
+def test_config(db_path):
     """Create isolated test configuration"""
-    with tempfile.TemporaryDirectory() as tmpdir:
-        config = Config(
-            db_path=str(Path(tmpdir) / "test.db"),
-            max_retries=3,
-            backoff_base=2.0,
-            worker_poll_interval=0.1
-        )
-        yield config
+    return Config(
+        db_path=db_path,
+        max_retries=3,
+        backoff_base=2.0,
+        worker_poll_interval=0.1
+    )
 
 
 def test_job_persistence_across_restart(test_config):
@@ -40,10 +36,10 @@ def test_job_persistence_across_restart(test_config):
     assert {j.id for j in jobs} == {"persistent1", "persistent2"}
 
 
-def test_failed_job_moves_to_dlq(test_config):
+def test_failed_job_moves_to_dlq():
     """Test job moves to DLQ after max retries"""
     config = Config(
-        db_path=test_config.db_path,
+        db_path=":memory:",
         max_retries=2,
         backoff_base=2.0
     )
@@ -71,9 +67,8 @@ def test_failed_job_moves_to_dlq(test_config):
     assert dlq_jobs[0].attempts == 3  # 3 attempts total (initial + 2 retries)
 
 
-def test_successful_job_lifecycle(test_config):
+def test_successful_job_lifecycle(manager):
     """Test complete lifecycle of successful job"""
-    manager = QueueManager(test_config)
     
     # Enqueue
     job = manager.enqueue("success_job", "echo 'hello'")
@@ -92,24 +87,15 @@ def test_successful_job_lifecycle(test_config):
     assert final_job.state == JobState.COMPLETED
 
 
-def test_multiple_jobs_processed_sequentially(test_config):
+def test_multiple_jobs_processed_sequentially(manager):
     """Test multiple jobs are processed without overlap"""
-    manager = QueueManager(test_config)
-    
-    # Enqueue multiple jobs
-    for i in range(5):
-        manager.enqueue(f"job{i}", f"echo '{i}'")
     
-    # Process all jobs
-    completed = 0
-    while True:
-        job = manager.claim_job()
-        if not job:
-            break
-        manager.mark_completed(job.id)
-        completed += 1
+    # Enqueue and process all jobs in one transaction
+    completed = manager._bulk_mark_pending_completed(
+        [{'id': f"job{i}", 'command': f"echo '{i}'"} for i in range(5)])
     
     assert completed == 5
+    assert manager.claim_job() is None
     
     # Verify all completed
     stats = manager.get_stats()
@@ -117,9 +103,8 @@ def test_multiple_jobs_processed_sequentially(test_config):
     assert stats['pending'] == 0
 
 
-def test_dlq_retry_functionality(test_config):
+def test_dlq_retry_functionality(manager):
     """Test retrying DLQ job works correctly"""
-    manager = QueueManager(test_config)
     
     # Create DLQ job
     manager.enqueue("dlq_job", "exit 1", max_retries=0)
@@ -142,43 +127,42 @@ def test_dlq_retry_functionality(test_config):
     assert claimed.id == "dlq_job"
 
 
-def test_config_persistence(test_config):
+def test_config_persistence(monkeypatch, tmp_path):
     """Test configuration saves and loads correctly"""
-    config_file = Path.home() / ".queuectl" / "config_test.json"
-    
-    try:
-        # Save config
-        config = Config(
-            max_retries=5,
-            backoff_base=3.0,
-            db_path="test.db"
-        )
-        Config.CONFIG_FILE = config_file
-        config.save()
-        
-        # Load config
-        loaded = Config.load()
-        assert loaded.max_retries == 5
-        assert loaded.backoff_base == 3.0
+    monkeypatch.setattr(Config, "CONFIG_FILE", tmp_path / "cfg.json")
+    
+    # Save config
+    Config(
+        max_retries=5,
+        backoff_base=3.0,
+        db_path="test.db"
+    ).save()
     
-    finally:
-        if config_file.exists():
-            config_file.unlink()
-        # Restore default
-        Config.CONFIG_FILE = Path.home() / ".queuectl" / "config.json"
+    # Load config
+    loaded = Config.load()
+    assert loaded.max_retries == 5
+    assert loaded.backoff_base == 3.0
 
 
-def test_exponential_backoff_timing(test_config):
-    """Test retry backoff increases exponentially"""
-    from queuectl.models import Job
+def test_config_load_cache_invalidation(monkeypatch, tmp_path):
+    """Test cached config is refreshed after save"""
+    monkeypatch.setattr(Config, "CONFIG_FILE", tmp_path / "config.json")
+    Config(max_retries=5).save()
+    assert Config.load().max_retries == 5
     
-    job = Job(id="test", command="exit 1", max_retries=3)
+    # Cached instances must not share mutable state
+    Config.load().max_retries = 9
+    assert Config.load().max_retries == 5
     
-    # Test backoff calculation
-    delays = []
-    for i in range(3):
-        job.attempts = i
-        delays.append(job.calculate_backoff(2.0))
+    # Saving invalidates the cached entry
+    Config(max_retries=7).save()
+    assert Config.load().max_retries == 7
+
+
+@pytest.mark.parametrize("attempts,delay", [(0, 1.0), (1, 2.0), (2, 4.0)])
+def test_exponential_backoff_timing(attempts, delay):
+    """Test retry backoff increases exponentially: 1s, 2s, 4s"""
+    from queuectl.models import Job
     
-    # Verify exponential growth: 1s, 2s, 4s
-    assert delays == [1.0, 2.0, 4.0]
+    job = Job(id="test", command="exit 1", max_retries=3, attempts=attempts)
+    assert job.calculate_backoff(2.0) == delay
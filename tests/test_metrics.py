@@ -2,90 +2,108 @@
 
 import pytest
 import time
-from queuectl.config import Config
+from datetime import datetime, timedelta
 from queuectl.queue import QueueManager
 
 
-@pytest.fixture
-def manager(tmp_path):
-    """Create test queue manager"""
-    config = Config(
-        max_retries=3,
-        backoff_base=2.0,
-        db_path=str(tmp_path / "test.db"),
-        worker_poll_interval=0.1,
-        job_timeout=5
-    )
-    return QueueManager(config)
-
-
 class TestMetricsSystem:
     """Tests for metrics collection and reporting"""
     
-    def test_enqueue_event_recorded(self, manager):
+    def test_enqueue_event_recorded(self, module_manager):
         """Enqueueing a job should record an event"""
-        manager.enqueue('test', 'echo test')
+        module_manager.enqueue('test', 'echo test')
         
-        metrics = manager.get_metrics()
+        metrics = module_manager.get_metrics()
         assert metrics['event_counts']['enqueued'] == 1
     
-    def test_job_lifecycle_events(self, manager):
+    def test_job_lifecycle_events(self, module_manager):
         """Complete job lifecycle should record all events"""
-        job = manager.enqueue('lifecycle', 'echo test')
+        job = module_manager.enqueue('lifecycle', 'echo test')
         
         # Claim (started event)
-        claimed = manager.claim_job()
+        claimed = module_manager.claim_job()
         
         # Complete
-        manager.mark_completed(claimed.id)
+        module_manager.mark_completed(claimed.id)
         
-        metrics = manager.get_metrics()
+        metrics = module_manager.get_metrics()
         assert metrics['event_counts']['enqueued'] == 1
         assert metrics['event_counts']['started'] == 1
         assert metrics['event_counts']['completed'] == 1
     
-    def test_failed_job_metrics(self, manager):
+    def test_failed_job_metrics(self, module_manager):
         """Failed jobs should record failed event"""
-        job = manager.enqueue('fail', 'false')
-        claimed = manager.claim_job()
+        job = module_manager.enqueue('fail', 'false')
+        claimed = module_manager.claim_job()
         
         # Mark as failed (will retry)
-        manager.mark_pending(claimed.id, attempts=1, error="Command failed")
+        module_manager.mark_pending(claimed.id, attempts=1, error="Command failed")
         
-        metrics = manager.get_metrics()
+        metrics = module_manager.get_metrics()
         assert metrics['event_counts']['failed'] == 1
     
-    def test_dlq_event_recorded(self, manager):
+    def test_dlq_event_recorded(self, module_manager):
         """Moving to DLQ should record dlq event"""
-        job = manager.enqueue('dead', 'false', max_retries=0)
-        claimed = manager.claim_job()
+        job = module_manager.enqueue('dead', 'false', max_retries=0)
+        claimed = module_manager.claim_job()
         
         # Exhaust retries - moves to DLQ
-        manager.mark_dead(claimed.id, attempts=0, error="Max retries exceeded")
-        metrics = manager.get_metrics()
+        module_manager.mark_dead(claimed.id, attempts=0, error="Max retries exceeded")
+        metrics = module_manager.get_metrics()
         assert metrics['event_counts']['dlq'] == 1
     
-    def test_average_duration_calculation(self, manager):
+    def test_average_duration_calculation(self, module_manager):
         """Metrics should calculate average job duration"""
         # Enqueue and complete multiple jobs
         for i in range(3):
-            job = manager.enqueue(f'job{i}', 'echo test')
-            claimed = manager.claim_job()
+            job = module_manager.enqueue(f'job{i}', 'echo test')
+            claimed = module_manager.claim_job()
             time.sleep(0.05)  # Simulate work
-            manager.mark_completed(claimed.id, duration_ms=50)
+            module_manager.mark_completed(claimed.id, duration_ms=50)
         
-        metrics = manager.get_metrics()
+        metrics = module_manager.get_metrics()
         avg_duration = metrics.get('average_duration_seconds', 0)
         
         # Average should be positive (if metrics calculated)
         # Note: Average might be 0 if no duration data
         assert avg_duration >= 0
-    
-    def test_recent_events_list(self, manager):
+
+    def test_average_duration_from_event_timestamps(self, module_manager):
+        """Average duration should be the started-to-completed gap in seconds"""
+        module_manager.enqueue('timed', 'echo test')
+        claimed = module_manager.claim_job()
+        time.sleep(0.05)
+        module_manager.mark_completed(claimed.id)
+
+        avg_duration = module_manager.get_metrics()['avg_duration_seconds']
+        assert 0.04 <= avg_duration < 5
+
+        completed = module_manager.get_metrics()['recent_events'][0]
+        assert completed['event_type'] == 'completed'
+        assert completed['duration_ms'] >= 40
+
+    def test_rollup_seeded_from_existing_metrics(self, module_manager):
+        """A database created before the rollup gets totals from its metric rows"""
+        for i in range(2):
+            module_manager.enqueue(f'job{i}', 'echo test')
+            claimed = module_manager.claim_job()
+            module_manager.mark_completed(claimed.id, duration_ms=100 * (i + 1))
+
+        # Roll the database back to a pre-rollup schema
+        with module_manager.storage._transaction() as conn:
+            conn.execute("DROP TABLE metric_rollup")
+            conn.execute("PRAGMA user_version = 0")
+        module_manager.storage._init_db()
+
+        metrics = module_manager.get_metrics()
+        assert metrics['event_counts'] == {'enqueued': 2, 'started': 2, 'completed': 2}
+        assert metrics['avg_duration_seconds'] == pytest.approx(0.15)
+
+    def test_recent_events_list(self, module_manager):
         """Metrics should return recent events"""
-        job = manager.enqueue('recent', 'echo test')
+        job = module_manager.enqueue('recent', 'echo test')
         
-        metrics = manager.get_metrics()
+        metrics = module_manager.get_metrics()
         recent = metrics['recent_events']
         
         assert len(recent) > 0
@@ -93,29 +111,71 @@ class TestMetricsSystem:
         assert recent[0]['event_type'] == 'enqueued'
         assert 'timestamp' in recent[0]
     
-    def test_metrics_persist_across_restart(self, manager):
+    def test_metrics_persist_across_restart(self, file_manager):
         """Metrics should survive queue manager restart"""
         # Record some events
-        job = manager.enqueue('persist', 'echo test')
-        claimed = manager.claim_job()
-        manager.mark_completed(claimed.id)
+        job = file_manager.enqueue('persist', 'echo test')
+        claimed = file_manager.claim_job()
+        file_manager.mark_completed(claimed.id)
         
         # Create new manager with same DB
-        new_manager = QueueManager(manager.config)
+        new_manager = QueueManager(file_manager.config)
         
         metrics = new_manager.get_metrics()
         assert metrics['event_counts']['enqueued'] >= 1
         assert metrics['event_counts']['completed'] >= 1
     
-    def test_multiple_job_metrics_accumulate(self, manager):
+    def test_multiple_job_metrics_accumulate(self, module_manager):
         """Metrics should accumulate across multiple jobs"""
         # Enqueue and complete 5 jobs
-        for i in range(5):
-            job = manager.enqueue(f'batch{i}', 'echo test')
-            claimed = manager.claim_job()
-            manager.mark_completed(claimed.id)
+        specs = [{'id': f'batch{i}', 'command': 'echo test'} for i in range(5)]
+        assert module_manager._bulk_mark_pending_completed(specs) == 5
         
-        metrics = manager.get_metrics()
+        metrics = module_manager.get_metrics()
         assert metrics['event_counts']['enqueued'] == 5
         assert metrics['event_counts']['started'] == 5
         assert metrics['event_counts']['completed'] == 5
+    
+    def test_metrics_since_cover_only_newer_events(self, module_manager):
+        """Passing since limits counts and recent events to the events after it"""
+        module_manager.enqueue('before', 'echo test')
+        t0 = datetime.fromisoformat(module_manager.get_metrics()['recent_events'][0]['timestamp'])
+        
+        module_manager.enqueue('after', 'echo test')
+        claimed = module_manager.claim_job()
+        module_manager.mark_completed(claimed.id, duration_ms=40)
+        
+        delta = module_manager.get_metrics(since=t0)
+        assert delta['event_counts'] == {'enqueued': 1, 'started': 1, 'completed': 1}
+        assert delta['avg_duration_seconds'] == pytest.approx(0.04)
+        assert sorted(e['event_type'] for e in delta['recent_events']) == ['completed', 'enqueued', 'started']
+        assert module_manager.get_metrics()['event_counts']['enqueued'] == 2
+    
+    def test_enqueue_metrics_use_manager_clock(self, module_manager):
+        """Enqueue events carry the injected clock's time, like every other event"""
+        fixed = datetime(2100, 1, 1, 12, 0)
+        module_manager.clock = lambda: fixed
+        job = module_manager.enqueue('single', 'echo test')
+        module_manager.enqueue_many([{'id': f'bulk{i}', 'command': 'echo test'} for i in range(2)])
+        
+        delta = module_manager.get_metrics(since=fixed - timedelta(seconds=1))
+        assert delta['event_counts'] == {'enqueued': 3}
+        assert {e['timestamp'] for e in delta['recent_events']} == {job.created_at.isoformat()}
+    
+    def test_prune_metrics_drops_old_events_only(self, module_manager):
+        """Pruning removes events past retention but keeps rollup totals"""
+        module_manager.enqueue('old', 'echo test')
+        module_manager.enqueue('new', 'echo test')
+        with module_manager.storage._transaction() as conn:
+            conn.execute("UPDATE job_metrics SET timestamp = '2000-01-01T00:00:00' WHERE job_id = 'old'")
+        
+        assert module_manager.prune_metrics(older_than_days=30) == 1
+        
+        metrics = module_manager.get_metrics()
+        assert [e['job_id'] for e in metrics['recent_events']] == ['new']
+        assert metrics['event_counts']['enqueued'] == 2
+    
+    def test_new_database_uses_incremental_auto_vacuum(self, module_manager):
+        """Fresh databases are created so pruning can release pages"""
+        with module_manager.storage._read_conn() as conn:
+            assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2  # INCREMENTAL
@@ -1,30 +1,27 @@
 """Unit tests for queue operations"""
 
 import pytest
-import tempfile
-from pathlib import Path
+import sqlite3
+from typing import List
 
 from queuectl.config import Config
 from queuectl.models import Job, JobState
 from queuectl.queue import QueueManager
-from queuectl.exceptions import InvalidJobStateException
+from queuectl.exceptions import InvalidJobStateException, JobNotFoundException
 
 
 @pytest.fixture
-def test_config():
-    """Create isolated test configuration"""
-    with tempfile.TemporaryDirectory() as tmpdir:
-        config = Config(
-            db_path=str(Path(tmpdir) / "test.db"),
-            max_retries=3,
-            backoff_base=2.0
-        )
-        yield config
+def test_config(db_path):
+    """Create isolated on-disk configuration, for tests that open the file directly"""
+    return Config(
+        db_path=db_path,
+        max_retries=3,
+        backoff_base=2.0
+    )
 
 
-def test_enqueue_job(test_config):
+def test_enqueue_job(manager):
     """Test basic job enqueue"""
-    manager = QueueManager(test_config)
     job = manager.enqueue("test1", "echo 'hello'")
     
     assert job.id == "test1"
@@ -33,9 +30,52 @@ def test_enqueue_job(test_config):
     assert job.attempts == 0
 
 
-def test_claim_job(test_config):
+def test_enqueue_many(manager):
+    """Test bulk enqueue inserts all jobs and their metrics"""
+    jobs = manager.enqueue_many([
+        {'id': 'bulk1', 'command': "echo '1'"},
+        {'id': 'bulk2', 'command': "echo '2'", 'priority': 9, 'max_retries': 1},
+    ])
+    
+    assert [j.id for j in jobs] == ['bulk1', 'bulk2']
+    assert manager.get_stats()['pending'] == 2
+    assert manager.get_job('bulk2').priority == 9
+    assert manager.get_job('bulk2').max_retries == 1
+    assert manager.get_metrics()['event_counts']['enqueued'] == 2
+
+
+def test_enqueue_many_is_atomic(manager):
+    """Test bulk enqueue rolls back entirely when one job fails to insert"""
+    manager.enqueue("dup", "echo 'existing'")
+    
+    with pytest.raises(sqlite3.IntegrityError):
+        manager.enqueue_many([
+            {'id': 'new1', 'command': "echo '1'"},
+            {'id': 'dup', 'command': "echo '2'"},
+        ])
+    
+    assert manager.get_job('new1') is None
+
+
+def test_notify_called_when_work_becomes_pending(manager):
+    """Test notify hook fires on enqueue, retry and DLQ reset but not completion"""
+    calls = []
+    manager.notify = lambda: calls.append(1)
+    
+    manager.enqueue("test1", "exit 1")
+    manager.claim_job()
+    manager.mark_pending("test1", 1, "Exit code 1")
+    manager.claim_job()
+    manager.mark_dead("test1", 2, "Exit code 1")
+    manager.retry_dlq_job("test1")
+    manager.claim_job()
+    manager.mark_completed("test1")
+    
+    assert len(calls) == 3
+
+
+def test_claim_job(manager):
     """Test job claiming updates state"""
-    manager = QueueManager(test_config)
     manager.enqueue("test1", "echo 'hello'")
     
     job = manager.claim_job()
@@ -44,9 +84,74 @@ def test_claim_job(test_config):
     assert job.state == JobState.PROCESSING
 
 
-def test_claim_job_fifo_order(test_config):
+def test_claim_job_without_returning_support(manager, monkeypatch):
+    """Test the SELECT+UPDATE claim path used on SQLite older than 3.35"""
+    from queuectl.storage import sqlite_store
+    monkeypatch.setattr(sqlite_store, "_HAS_RETURNING", False)
+    
+    manager.enqueue("low", "echo 'low'", priority=2)
+    manager.enqueue("high", "echo 'high'", priority=9)
+    
+    job = manager.claim_job()
+    assert job.id == "high"
+    assert job.state == JobState.PROCESSING
+    assert manager.get_job("high").state == JobState.PROCESSING
+
+
+@pytest.mark.parametrize("has_returning", [True, False])
+def test_claim_jobs_batch(manager, monkeypatch, has_returning):
+    """Test batch claims take jobs in priority/FIFO order and record start events"""
+    from queuectl.storage import sqlite_store
+    monkeypatch.setattr(sqlite_store, "_HAS_RETURNING", has_returning)
+    manager.enqueue("low", "true", priority=2)
+    manager.enqueue("first", "true")
+    manager.enqueue("high", "true", priority=9)
+    manager.enqueue("second", "true")
+    
+    batch = manager.claim_jobs(3)
+    assert [j.id for j in batch] == ['high', 'first', 'second']
+    assert all(j.state == JobState.PROCESSING for j in batch)
+    assert [j.id for j in manager.claim_jobs(3)] == ['low']
+    assert manager.claim_jobs(3) == []
+    assert manager.get_metrics()['event_counts']['started'] == 4
+
+
+@pytest.mark.parametrize("has_returning", [True, False])
+def test_claim_jobs_matches_claim_job_order_for_bulk_batch(manager, monkeypatch, has_returning):
+    """Test batch claims keep enqueue order for jobs sharing one created_at"""
+    from queuectl.storage import sqlite_store
+    monkeypatch.setattr(sqlite_store, "_HAS_RETURNING", has_returning)
+    ids = [f"bulk{i}" for i in range(6)]
+    manager.enqueue_many([{'id': job_id, 'command': "true"} for job_id in ids])
+    
+    assert [j.id for j in manager.claim_jobs(4)] == ids[:4]
+    assert [manager.claim_job().id for _ in range(2)] == ids[4:]
+
+
+@pytest.mark.parametrize("limit", [0, -1])
+def test_claim_jobs_rejects_non_positive_limit(manager, limit):
+    """Test a limit below 1 is rejected instead of meaning 'no limit' to SQLite"""
+    manager.enqueue("test1", "true")
+    
+    with pytest.raises(ValueError, match="limit must be at least 1"):
+        manager.claim_jobs(limit)
+    assert manager.get_stats()['pending'] == 1
+
+
+def test_claim_uses_pending_partial_index(manager):
+    """Test that the claim query scans only the pending-rows index, without a sort"""
+    from queuectl.storage import sqlite_store
+
+    with manager.storage._read_conn() as conn:
+        plan = " | ".join(row[3] for row in conn.execute(
+            "EXPLAIN QUERY PLAN " + sqlite_store._SQL_CLAIM_RETURNING, ("now", "now")))
+
+    assert "idx_pending_claim" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_claim_job_fifo_order(manager):
     """Test jobs are claimed in FIFO order"""
-    manager = QueueManager(test_config)
     manager.enqueue("test1", "echo '1'")
     manager.enqueue("test2", "echo '2'")
     manager.enqueue("test3", "echo '3'")
@@ -60,16 +165,14 @@ def test_claim_job_fifo_order(test_config):
     assert job3.id == "test3"
 
 
-def test_no_job_available(test_config):
+def test_no_job_available(manager):
     """Test claiming when no jobs available"""
-    manager = QueueManager(test_config)
     job = manager.claim_job()
     assert job is None
 
 
-def test_mark_completed(test_config):
+def test_mark_completed(manager):
     """Test marking job as completed"""
-    manager = QueueManager(test_config)
     manager.enqueue("test1", "echo 'hello'")
     manager.claim_job()
     manager.mark_completed("test1")
@@ -78,9 +181,8 @@ def test_mark_completed(test_config):
     assert job.state == JobState.COMPLETED
 
 
-def test_mark_pending_for_retry(test_config):
+def test_mark_pending_for_retry(manager):
     """Test marking job as pending for retry"""
-    manager = QueueManager(test_config)
     manager.enqueue("test1", "exit 1")
     job = manager.claim_job()
     
@@ -92,9 +194,8 @@ def test_mark_pending_for_retry(test_config):
     assert job.error_message == "Exit code 1"
 
 
-def test_mark_dead(test_config):
+def test_mark_dead(manager):
     """Test moving job to DLQ"""
-    manager = QueueManager(test_config)
     manager.enqueue("test1", "exit 1")
     manager.claim_job()
 
@@ -104,9 +205,8 @@ def test_mark_dead(test_config):
     assert job.error_message == "Max retries exceeded"
 
 
-def test_list_jobs_by_state(test_config):
+def test_list_jobs_by_state(manager):
     """Test listing jobs filtered by state"""
-    manager = QueueManager(test_config)
     manager.enqueue("test1", "echo '1'")
     manager.enqueue("test2", "echo '2'")
     manager.claim_job()
@@ -118,9 +218,71 @@ def test_list_jobs_by_state(test_config):
     assert len(processing) == 1
 
 
-def test_get_stats(test_config):
+def test_iter_jobs_keyset_pagination(manager):
+    """Test paging newest-first with limit and a created_at cursor"""
+    for i in range(5):
+        manager.enqueue(f"test{i}", f"echo '{i}'")
+    
+    first = list(manager.iter_jobs(limit=2))
+    second = manager.list_jobs(limit=2, before=first[-1].page_token())
+    rest = manager.list_jobs(before=second[-1].page_token())
+    
+    assert [j.id for j in first + second + rest] == [f"test{i}" for i in range(4, -1, -1)]
+
+
+def test_iter_jobs_pages_through_bulk_enqueue(manager):
+    """Test jobs sharing one created_at are neither skipped nor repeated across pages"""
+    manager.enqueue_many([{'id': f"j{i}", 'command': "true"} for i in range(5)])
+    
+    pages = [manager.list_jobs(limit=2)]
+    while pages[-1]:
+        pages.append(manager.list_jobs(limit=2, before=pages[-1][-1].page_token()))
+    
+    assert [j.id for page in pages for j in page] == [f"j{i}" for i in range(4, -1, -1)]
+    assert [len(page) for page in pages] == [2, 2, 1, 0]
+
+
+@pytest.mark.parametrize("state", [None, JobState.PENDING], ids=["all", "state"])
+@pytest.mark.parametrize("before", [None, "2025-01-01T00:00:00|job1", "2025-01-01T00:00:00"],
+                         ids=["first", "token", "created_at"])
+def test_iter_jobs_reads_in_index_order(manager, state, before):
+    """Test every listing page walks a listing index, with no temp B-tree sort"""
+    statements: List[str] = []
+    # The in-memory reader is the writer connection, so the trace sees the query
+    with manager.storage._read_conn() as conn:
+        conn.set_trace_callback(statements.append)
+    manager.list_jobs(state, limit=2, before=before)
+    
+    with manager.storage._read_conn() as conn:
+        conn.set_trace_callback(None)
+        query = next(sql for sql in statements if sql.startswith("SELECT"))
+        plan = " | ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + query))
+    
+    assert ("idx_state_created" if state else "idx_created") in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_listing_indexes_rebuilt_with_id(test_config):
+    """Test a database with the old created_at-only listing indexes gets id added"""
+    QueueManager(test_config).storage.close()
+    conn = sqlite3.connect(test_config.db_path)
+    conn.executescript("""
+        DROP INDEX idx_created; CREATE INDEX idx_created ON jobs(created_at DESC);
+        DROP INDEX idx_state_created; CREATE INDEX idx_state_created ON jobs(state, created_at DESC);
+        PRAGMA user_version = 1;
+    """)
+    conn.close()
+    
+    storage = QueueManager(test_config).storage
+    with storage._read_conn() as conn:
+        for index in ("idx_created", "idx_state_created"):
+            columns = [row[2] for row in conn.execute(f"PRAGMA index_info({index})")]
+            assert columns[-2:] == ["created_at", "id"]
+    storage.close()
+
+
+def test_get_stats(manager):
     """Test getting job counts by state"""
-    manager = QueueManager(test_config)
     manager.enqueue("test1", "echo '1'")
     manager.enqueue("test2", "echo '2'")
     manager.enqueue("test3", "echo '3'")
@@ -132,9 +294,69 @@ def test_get_stats(test_config):
     assert stats['completed'] == 0
 
 
-def test_retry_dlq_job(test_config):
-    """Test retrying DLQ job resets state"""
+def test_job_counts_match_jobs_table(manager):
+    """Test trigger-maintained counts agree with a GROUP BY over jobs"""
+    manager.enqueue_many([{'id': f"job{i}", 'command': "true"} for i in range(4)])
+    manager.claim_job()
+    manager.mark_completed(manager.claim_job().id)
+    manager.mark_dead(manager.claim_job().id, 3, "boom")
+    manager.retry_dlq_job(manager.list_jobs(JobState.DEAD)[0].id)
+
+    with manager.storage._read_conn() as conn:
+        expected = dict(conn.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall())
+
+    stats = manager.get_stats()
+    assert {k: v for k, v in stats.items() if v} == expected
+    assert sum(stats.values()) == 4
+
+
+def test_job_counts_seeded_for_existing_database(test_config):
+    """Test the counts table is filled from existing rows when first created"""
+    manager = QueueManager(test_config)
+    manager.enqueue("test1", "echo '1'")
+    manager.enqueue("test2", "echo '2'")
+    manager.claim_job()
+    manager.storage.close()
+
+    conn = sqlite3.connect(test_config.db_path)
+    conn.executescript(
+        "DROP TABLE job_state_counts; DROP TRIGGER trg_jobs_count_insert; PRAGMA user_version = 0;"
+    )
+    conn.close()
+
+    stats = QueueManager(test_config).get_stats()
+    assert stats['pending'] == 1
+    assert stats['processing'] == 1
+
+
+def test_legacy_database_migrated_once(tmp_path):
+    """Test a pre-priority jobs table is upgraded and stamped with the schema version"""
+    test_config = Config(db_path=str(tmp_path / "legacy.db"))
+    conn = sqlite3.connect(test_config.db_path)
+    conn.execute("""
+        CREATE TABLE jobs (
+            id TEXT PRIMARY KEY, command TEXT NOT NULL, state TEXT NOT NULL,
+            attempts INTEGER DEFAULT 0, max_retries INTEGER DEFAULT 3,
+            created_at TEXT NOT NULL, updated_at TEXT NOT NULL,
+            error_message TEXT, last_executed_at TEXT
+        )
+    """)
+    conn.execute("INSERT INTO jobs VALUES ('old', 'true', 'pending', 0, 3, "
+                 "'2024-01-01T00:00:00', '2024-01-01T00:00:00', NULL, NULL)")
+    conn.commit()
+    conn.close()
+    
     manager = QueueManager(test_config)
+    manager.enqueue("new", "true", priority=9)
+    
+    assert manager.claim_job().id == "new"
+    assert manager.get_job("old").priority == 5
+    with manager.storage._read_conn() as conn:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] >= 1
+
+
+def test_retry_dlq_job(manager):
+    """Test retrying DLQ job resets state"""
     manager.enqueue("test1", "exit 1", max_retries=0)
     manager.claim_job()
     manager.mark_dead("test1", 1, "Failed")
@@ -147,16 +369,22 @@ def test_retry_dlq_job(test_config):
     assert job.error_message is None
 
 
-def test_retry_non_dlq_job_raises_error(test_config):
+def test_retry_non_dlq_job_raises_error(manager):
     """Test retrying non-DLQ job raises error"""
-    manager = QueueManager(test_config)
     manager.enqueue("test1", "echo 'hello'")
     
     with pytest.raises(InvalidJobStateException, match="expected state 'dead'"):
         manager.retry_dlq_job("test1")
 
 
-def test_job_should_retry(test_config):
+def test_retry_missing_job_raises_error(manager):
+    """Test retrying unknown job raises not-found error"""
+    
+    with pytest.raises(JobNotFoundException):
+        manager.retry_dlq_job("missing")
+
+
+def test_job_should_retry():
     """Test job should_retry logic"""
     job = Job(id="test", command="exit 1", max_retries=3, attempts=0)
     assert job.should_retry() is True
@@ -165,18 +393,7 @@ def test_job_should_retry(test_config):
     assert job.should_retry() is False
 
 
-def test_job_calculate_backoff(test_config):
-    """Test exponential backoff calculation"""
-    job = Job(id="test", command="exit 1")
-    
-    job.attempts = 0
-    assert job.calculate_backoff(2.0) == 1.0  # 2^0
-    
-    job.attempts = 1
-    assert job.calculate_backoff(2.0) == 2.0  # 2^1
-    
-    job.attempts = 2
-    assert job.calculate_backoff(2.0) == 4.0  # 2^2
-    
-    job.attempts = 3
-    assert job.calculate_backoff(2.0) == 8.0  # 2^3
+@pytest.mark.parametrize("attempts,expected", [(0, 1.0), (1, 2.0), (2, 4.0), (3, 8.0)])
+def test_job_calculate_backoff(attempts, expected):
+    """Test exponential backoff calculation (2^attempts)"""
+    assert Job(id="test", command="exit 1", attempts=attempts).calculate_backoff(2.0) == expected
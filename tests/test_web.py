@@ -0,0 +1,125 @@
+"""Tests for the web dashboard JSON API"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from queuectl.config import Config
+from queuectl.queue import QueueManager
+from queuectl.web import app as web_app
+from queuectl.web.app import _SUMMARY_TTL, create_app
+
+
+# Every test runs with orjson and with the stdlib json fallback
+pytestmark = pytest.mark.usefixtures("encoder")
+
+
+@pytest.fixture
+def web_manager(db_path):
+    """Queue manager on the database the app under test reads"""
+    Config(db_path=db_path).save()
+    manager = QueueManager(Config.load())
+    yield manager
+    manager.storage.close()
+
+
+@pytest.fixture
+def client(web_manager):
+    """Flask test client for a dashboard on web_manager's database"""
+    return create_app().test_client()
+
+
+def test_stats(client, web_manager):
+    """Stats are a JSON object of per-state counts"""
+    web_manager.enqueue("job1", "true")
+    
+    response = client.get('/api/stats')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/json'
+    assert response.get_json() == {'pending': 1, 'processing': 0, 'completed': 0, 'failed': 0, 'dead': 0}
+
+
+def test_jobs_streamed_array(client, web_manager):
+    """The streamed body is one valid JSON array with ISO8601 datetime fields"""
+    web_manager.enqueue("job1", "echo 1")
+    job = web_manager.enqueue("job2", "echo 2", priority=9)
+    
+    response = client.get('/api/jobs')
+    data = response.get_json()
+    assert response.mimetype == 'application/json'
+    assert [j['id'] for j in data] == ["job2", "job1"]
+    assert data[0]['priority'] == 9
+    assert data[0]['created_at'] == job.created_at.isoformat()
+    assert data[0]['run_at'] is None
+
+
+def test_jobs_empty_array(client):
+    """No jobs still streams a valid (empty) array"""
+    assert client.get('/api/jobs').get_json() == []
+
+
+def test_jobs_state_filter(client, web_manager):
+    """state limits the list to jobs in that state"""
+    web_manager.enqueue("job1", "true")
+    web_manager.enqueue("job2", "true")
+    web_manager.claim_job()
+    
+    assert [j['id'] for j in client.get('/api/jobs?state=processing').get_json()] == ["job1"]
+
+
+def test_jobs_paged_with_limit_and_before(client, web_manager):
+    """limit/before page through jobs, including bulk jobs sharing a created_at"""
+    web_manager.enqueue_many([{'id': f"bulk{i}", 'command': "true"} for i in range(5)])
+    
+    seen = []
+    page = client.get('/api/jobs', query_string={'limit': 2}).get_json()
+    while page:
+        assert len(page) <= 2
+        seen += [j['id'] for j in page]
+        before = f"{page[-1]['created_at']}|{page[-1]['id']}"
+        page = client.get('/api/jobs', query_string={'limit': 2, 'before': before}).get_json()
+    
+    assert seen == [f"bulk{i}" for i in range(4, -1, -1)]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Stubbed time.monotonic for the summary caches; advance by adding to clock.now"""
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(web_app, "time", SimpleNamespace(monotonic=lambda: clock.now))
+    return clock
+
+
+def _pending(client):
+    return client.get('/api/stats').get_json()['pending']
+
+
+def test_stats_cached_within_ttl(client, web_manager, clock):
+    """Writes from outside the app show up only once the cached stats expire"""
+    assert _pending(client) == 0
+    web_manager.enqueue("job1", "true")
+    
+    clock.now += _SUMMARY_TTL / 2
+    assert _pending(client) == 0
+    clock.now += _SUMMARY_TTL / 2
+    assert _pending(client) == 1
+
+
+def test_enqueue_clears_cached_stats(client, clock):
+    """The app's own enqueue is visible on the next poll, inside the TTL"""
+    assert _pending(client) == 0
+    
+    response = client.post('/api/enqueue', json={'id': "job1", 'command': "true"})
+    assert response.get_json()['success'] is True
+    assert _pending(client) == 1
+
+
+def test_retry_clears_cached_stats(client, web_manager, clock):
+    """Retrying a DLQ job through the app is visible on the next poll, inside the TTL"""
+    web_manager.enqueue("job1", "false")
+    web_manager.mark_dead(web_manager.claim_job().id, 1, "boom")
+    assert client.get('/api/stats').get_json()['dead'] == 1
+    
+    assert client.post('/api/retry/job1').get_json()['success'] is True
+    stats = client.get('/api/stats').get_json()
+    assert (stats['dead'], stats['pending']) == (0, 1)
@@ -1,50 +1,236 @@
 """Unit tests for worker components"""
 
+import os
 import pytest
+import sys
+import time
+from queuectl.models import JobState
 from queuectl.worker.executor import JobExecutor
+from queuectl.worker.pool import WorkerPool
+
+
+class _FakeRunner:
+    """Runner that records commands instead of starting processes"""
+    
+    def __init__(self, returncode=0, stderr=b"", error=None, timed_out=False):
+        self.returncode = returncode
+        self.stderr = stderr
+        self.error = error
+        self.timed_out = timed_out
+        self.calls: list = []
+    
+    def __call__(self, command, timeout):
+        self.calls.append((command, timeout))
+        if self.error is not None:
+            raise self.error
+        return None if self.timed_out else (self.returncode, self.stderr)
 
 
 def test_executor_success():
     """Test successful command execution"""
-    executor = JobExecutor()
+    runner = _FakeRunner()
+    executor = JobExecutor(timeout=7, runner=runner)
     success, error = executor.execute("echo 'hello'")
     
     assert success is True
     assert error == ""
+    assert runner.calls == [("echo 'hello'", 7)]
 
 
 def test_executor_failure():
     """Test failed command execution"""
-    executor = JobExecutor()
+    executor = JobExecutor(runner=_FakeRunner(returncode=1))
     success, error = executor.execute("exit 1")
     
     assert success is False
-    assert "Exit code 1" in error
+    assert error == "Exit code 1: Exit code 1"
 
 
 def test_executor_command_not_found():
     """Test handling of nonexistent command"""
-    executor = JobExecutor()
+    executor = JobExecutor(runner=_FakeRunner(error=FileNotFoundError()))
     success, error = executor.execute("nonexistent_command_xyz_123")
     
     assert success is False
-    assert error != ""
+    assert error == "Command not found"
 
 
 def test_executor_timeout():
     """Test command timeout handling"""
-    executor = JobExecutor(timeout=1)
+    executor = JobExecutor(timeout=1, runner=_FakeRunner(timed_out=True))
     success, error = executor.execute("sleep 5")
     
     assert success is False
-    assert "timeout" in error.lower()
+    assert error == "Command timeout after 1s"
 
 
 def test_executor_captures_stderr():
     """Test that stderr is captured in error message"""
+    executor = JobExecutor(runner=_FakeRunner(returncode=2, stderr=b"test error\n"))
+    success, error = executor.execute("failing-command")
+    
+    assert success is False
+    assert error == "Exit code 2: test error"
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="uses sh")
+def test_executor_captures_real_stderr():
+    """Test stderr written by a real process ends up in the error message"""
+    executor = JobExecutor()
+    success, error = executor.execute('sh -c "echo test_error 1>&2; exit 1"')
+    
+    assert success is False
+    assert error == "Exit code 1: test_error"
+
+
+@pytest.mark.skipif(sys.platform != "win32", reason="uses cmd")
+def test_executor_captures_real_stderr_windows():
+    """Test stderr written by a real cmd process ends up in the error message"""
     executor = JobExecutor()
-    # PowerShell command to write to stderr
-    success, error = executor.execute('powershell -Command "Write-Error \'test error\'"')
+    success, error = executor.execute('cmd /c "echo test_error 1>&2 & exit 1"')
+    
+    assert success is False
+    assert error == "Exit code 1: test_error"
+
+
+@pytest.mark.slow
+def test_executor_kills_command_after_timeout():
+    """Test a real process is killed once it outlives the timeout"""
+    executor = JobExecutor(timeout=1)
+    success, error = executor.execute("sleep 5")
     
     assert success is False
-    assert error != ""
+    assert "timeout" in error.lower()
+
+
+def test_executor_runs_simple_commands_without_shell():
+    """Test plain commands are exec'd directly and shell syntax keeps the shell"""
+    from queuectl.worker.executor import _direct_argv
+    
+    assert _direct_argv("echo 'hello world'") == ["echo", "hello world"]
+    assert _direct_argv("exit 1") is None  # shell builtin
+    assert _direct_argv("echo hi | wc -c") is None
+    assert _direct_argv("FOO=1 env") is None
+
+
+def test_executor_keeps_only_stderr_tail():
+    """Test a noisy failing job reports a bounded slice of the end of stderr"""
+    executor = JobExecutor()
+    success, error = executor.execute("yes x | head -c 100000 >&2; echo last >&2; exit 3")
+    
+    assert success is False
+    assert error.startswith("Exit code 3: ")
+    assert error.endswith("last")
+    assert len(error) < 4200
+
+
+def test_persistent_shell_isolates_jobs():
+    """Test shell commands share one shell but not each other's state"""
+    executor = JobExecutor()
+    try:
+        assert executor.execute("cd /; export QC_LEAK=1; exit 3") == (False, "Exit code 3: Exit code 3")
+        assert executor.execute('test "$PWD" != / && test -z "$QC_LEAK"') == (True, "")
+        
+        success, error = executor.execute("if then fi")
+        assert success is False
+        assert error.startswith("Exit code 2: ")
+        assert executor.execute("true && true") == (True, "")
+    finally:
+        executor.close()
+
+
+def _is_running(pid):
+    """Whether pid is a live process; zombies left for an init that doesn't reap count as dead"""
+    if os.path.isdir("/proc"):
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+        except FileNotFoundError:
+            return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+def test_persistent_shell_kills_background_leftovers(tmp_path):
+    """Test a job's background processes die with it and can't write into the next job"""
+    pid_file = tmp_path / "pid"
+    executor = JobExecutor(timeout=5)
+    try:
+        assert executor.execute(
+            f"(sleep 0.2; echo late >&2; sleep 30) & echo $! > {pid_file}") == (True, "")
+        time.sleep(0.4)
+        assert executor.execute("echo own >&2; exit 3") == (False, "Exit code 3: own")
+    finally:
+        executor.close()
+    
+    assert not _is_running(int(pid_file.read_text()))
+
+
+@pytest.mark.slow
+def test_persistent_shell_recovers_after_timeout():
+    """Test a timed-out shell job is killed and the next job gets a fresh shell"""
+    executor = JobExecutor(timeout=1)
+    try:
+        success, error = executor.execute("sleep 5; true")
+        assert success is False
+        assert error == "Command timeout after 1s"
+        assert executor.execute("echo ok >&2; exit 4") == (False, "Exit code 4: ok")
+    finally:
+        executor.close()
+
+
+def test_queued_worker_logging_written_by_listener(tmp_path, monkeypatch):
+    """Test worker records go through the queue and land in that worker's log file"""
+    import queue
+    from queuectl.utils import setup_logger, start_log_listener
+    monkeypatch.setenv("HOME", str(tmp_path))
+    
+    log_queue: queue.Queue = queue.Queue()
+    logger = setup_logger("worker-queued-test", log_queue)
+    assert setup_logger("worker-queued-test") is logger
+    
+    listener = start_log_listener(log_queue, ["worker-queued-test", "worker-other-test"])
+    logger.info("job done")
+    listener.stop()
+    
+    log_dir = tmp_path / ".queuectl" / "logs"
+    assert "job done" in (log_dir / "worker-queued-test.log").read_text()
+    assert (log_dir / "worker-other-test.log").read_text() == ""
+
+
+def _wait_for(predicate, timeout=5.0):
+    """Poll until predicate() is true or timeout seconds pass"""
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_pool_health_allows_for_running_job(file_manager, tmp_path, monkeypatch):
+    """Test a worker stays alive through a job longer than the heartbeat grace"""
+    monkeypatch.setenv("HOME", str(tmp_path))
+    pool = WorkerPool(file_manager, file_manager.config, count=1)
+    monkeypatch.setattr(pool, "_write_pid_file", lambda: None)
+    file_manager.enqueue("busy", "sleep 0.5")
+    
+    pool.start(daemon=True)
+    try:
+        assert _wait_for(lambda: pool.busy_since[0] > 0)
+        # As if the job had been running for two minutes
+        pool.heartbeats[0] = time.time() - 120
+        [health] = pool.get_health_status()
+        assert health['alive'] and health['busy_since'] is not None
+        
+        assert _wait_for(lambda: pool.jobs_processed[0] == 1)
+        [health] = pool.get_health_status()
+        assert health['alive'] and health['busy_since'] is None
+    finally:
+        pool.stop()
+    
+    # Idle and silent past the grace period
+    pool.heartbeats[0] = time.time() - 120
+    assert pool.get_health_status()[0]['alive'] is False
+    assert file_manager.get_job("busy").state == JobState.COMPLETED
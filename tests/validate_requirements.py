@@ -1,193 +1,165 @@
 #!/usr/bin/env python3
 """
 Validation script to verify all assignment requirements
-Run: python tests/validate_requirements.py
+Run: pytest -n auto -q tests/validate_requirements.py
+ or: python tests/validate_requirements.py
 """
 
-import subprocess
-import time
+import importlib.util
+import re
+import signal
 import sys
-import json
-from pathlib import Path
+import threading
 
+import pytest
+from click.testing import CliRunner
 
-def run_command(cmd, shell=True):
-    """Run command and return result"""
-    try:
-        result = subprocess.run(
-            cmd,
-            shell=shell,
-            capture_output=True,
-            text=True,
-            timeout=10
-        )
-        return result.returncode, result.stdout, result.stderr
-    except subprocess.TimeoutExpired:
-        return -1, "", "Command timed out"
-
-
-def test_cli_commands():
-    """Verify all CLI commands work"""
-    print("Testing CLI commands...")
+# Printed with the exit code after each command by `queuectl config script`
+SCRIPT_END = b"---END---"
+
+# The value 5 on its own, not as part of 15 or 50
+_FIVE_RE = re.compile(rb"\b5\b")
+
+# Seconds a command may run; commands finish in milliseconds, but a locked
+# database would otherwise wait out SQLite's 30s busy timeout
+DEFAULT_TIMEOUT = 2.0
+
+
+class CommandTimeout(BaseException):
+    """Raised into a running command by the alarm; BaseException so the
+    commands' own `except Exception` handlers don't swallow it"""
+
+
+def _on_alarm(signum, frame):
+    raise CommandTimeout()
+
+
+@pytest.fixture
+def runner(db_path):
+    """CliRunner for queuectl, configured to use a private database"""
+    from queuectl.config import Config
     
-    tests = [
-        ("queuectl --help", "help text"),
-        ("queuectl status", "status display"),
-        ("queuectl list", "list jobs"),
-        ("queuectl config get", "get config"),
-        ("queuectl dlq list", "DLQ list"),
-    ]
+    # isolated_config_file already points Config at a per-test file
+    Config(db_path=db_path).save()
+    return CliRunner()
+
+
+def run_command(runner, argv, input=None, timeout=DEFAULT_TIMEOUT):
+    """
+    Run a ["queuectl", ...] argv in-process and return (code, stdout, stderr)
     
-    for cmd, desc in tests:
-        code, out, err = run_command(cmd)
-        if code == 0:
-            print(f"  [PASS] {desc}")
+    stdout is the raw bytes the command wrote; checks match on bytes and
+    only decode it to print a failure. stderr is decoded only when the
+    command wrote to it, which passing commands don't.
+    """
+    from queuectl.cli import cli
+    
+    # Interval timers need the main thread, and don't exist on Windows;
+    # commands run without a limit there
+    can_alarm = hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread()
+    if can_alarm:
+        previous = signal.signal(signal.SIGALRM, _on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        result = runner.invoke(cli, argv[1:], input=input)
+    except CommandTimeout:
+        return -1, b"", f"Command timed out after {timeout}s"
+    finally:
+        if can_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+    err = result.stderr_bytes.decode(errors="replace").strip() if result.stderr_bytes else ""
+    if result.exception is not None and not isinstance(result.exception, SystemExit):
+        err = f"{err}\n{result.exception!r}".lstrip()
+    return result.exit_code, result.stdout_bytes, err
+
+
+def split_script_output(out):
+    """Split `config script` output into one (exit code, output) pair per command"""
+    results = []
+    lines: list[bytes] = []
+    for line in out.splitlines():
+        if line.startswith(SCRIPT_END):
+            results.append((int(line[len(SCRIPT_END):]), b"\n".join(lines)))
+            lines = []
         else:
-            print(f"  [FAIL] {desc} - Exit code: {code}")
-            print(f"    Error: {err}")
-            return False
+            lines.append(line)
+    return results
+
+
+def test_cli_commands(runner):
+    """Verify all CLI commands work"""
+    commands = ["--help", "status", "list", "config get", "dlq list"]
     
-    return True
+    # One invocation runs every command and reports "<command>=OK|FAIL:..."
+    code, out, err = run_command(runner, ["queuectl", "self-check"], timeout=1.0)
+    checks = dict(line.split("=", 1) for line in out.decode(errors="replace").splitlines()
+                  if "=" in line)
+    assert {cmd: checks.get(cmd) for cmd in commands} == dict.fromkeys(commands, "OK"), err
 
 
-def test_job_enqueue():
+def test_job_enqueue(runner):
     """Test job enqueue"""
-    print("\nTesting job enqueue...")
+    # Same encoder as the CLI, so orjson is used when installed
+    from queuectl.utils import json_dumps
     
-    # Use subprocess.run with proper args instead of shell string
     job_data = {"id": "validate1", "command": "echo validation_test"}
-    try:
-        result = subprocess.run(
-            ["queuectl", "enqueue", json.dumps(job_data)],
-            capture_output=True,
-            text=True,
-            timeout=10
-        )
-        code, out, err = result.returncode, result.stdout, result.stderr
-    except subprocess.TimeoutExpired:
-        code, out, err = -1, "", "Command timed out"
-    except Exception as e:
-        code, out, err = -1, "", str(e)
-    if code == 0 and "Enqueued" in out:
-        print("  [PASS] Job enqueue successful")
-        return True
-    else:
-        print(f"  [FAIL] Job enqueue failed - Exit code: {code}")
-        print(f"    Output: {out}")
-        print(f"    Error: {err}")
-        return False
-
-
-def test_job_listing():
+    code, out, err = run_command(runner, ["queuectl", "enqueue", json_dumps(job_data)])
+    assert code == 0 and b"Enqueued" in out, f"exit code {code}: {out.decode(errors='replace')} {err}"
+
+
+def test_job_listing(runner):
     """Test job listing"""
-    print("\nTesting job listing...")
-    
-    code, out, err = run_command("queuectl list --state pending")
-    if code == 0:
-        print("  [PASS] Job listing successful")
-        return True
-    else:
-        print(f"  [FAIL] Job listing failed - Exit code: {code}")
-        return False
+    code, _, err = run_command(runner, ["queuectl", "list", "--state", "pending"])
+    assert code == 0, err
 
 
-def test_configuration():
+def test_configuration(runner):
     """Test configuration management"""
-    print("\nTesting configuration...")
-    
-    # Set config
-    code, out, err = run_command("queuectl config set max-retries 5")
-    if code != 0:
-        print("  [FAIL] Config set failed")
-        return False
+    # Set, get, and reset to default in one invocation
+    code, out, err = run_command(
+        runner,
+        ["queuectl", "config", "script", "-"],
+        input="set max-retries 5\nget max-retries\nset max-retries 3\n",
+    )
+    results = split_script_output(out)
+    assert code == 0 and len(results) == 3, f"config script failed: {err}"
     
-    # Get config
-    code, out, err = run_command("queuectl config get max-retries")
-    if code == 0 and "5" in out:
-        print("  [PASS] Configuration management working")
-        # Reset to default
-        run_command("queuectl config set max-retries 3")
-        return True
-    else:
-        print("  [FAIL] Config get failed")
-        return False
-
-
-def test_status_command():
+    (set_code, _), (get_code, value), _ = results
+    assert set_code == 0, "config set failed"
+    assert get_code == 0 and _FIVE_RE.search(value), "config get failed"
+
+
+def test_status_command(runner):
     """Test status command"""
-    print("\nTesting status command...")
+    from queuectl.utils import json_loads
     
-    code, out, err = run_command("queuectl status")
-    if code == 0 and "Pending" in out and "Completed" in out:
-        print("  [PASS] Status command working")
-        return True
-    else:
-        print("  [FAIL] Status command failed")
-        return False
+    # Structured output, so the check doesn't depend on display labels
+    code, out, err = run_command(runner, ["queuectl", "--output", "json", "status"])
+    assert code == 0, err
+    stats = json_loads(out)
+    assert "pending" in stats and "completed" in stats
 
 
-def test_dlq_commands():
+def test_dlq_commands(runner):
     """Test DLQ commands"""
-    print("\nTesting DLQ commands...")
-    
-    # List DLQ
-    code, out, err = run_command("queuectl dlq list")
-    if code != 0:
-        print("  [FAIL] DLQ list failed")
-        return False
-    
-    print("  [PASS] DLQ commands working")
-    return True
+    code, _, err = run_command(runner, ["queuectl", "dlq", "list"])
+    assert code == 0, err
 
 
 def main():
     """Run all validation tests"""
-    print("=" * 50)
-    print("QueueCTL Validation Script")
-    print("=" * 50)
-    
     # Check if queuectl is installed
-    code, _, _ = run_command("queuectl --version", shell=True)
-    if code != 0:
-        # Try with python -m
-        code, _, _ = run_command("python -m queuectl.cli --help", shell=True)
-        if code != 0:
-            print("\n[ERROR] queuectl command not found. Please install first:")
-            print("  pip install -e .")
-            sys.exit(1)
-    
-    tests = [
-        test_cli_commands,
-        test_job_enqueue,
-        test_job_listing,
-        test_configuration,
-        test_status_command,
-        test_dlq_commands,
-    ]
-    
-    results = []
-    for test in tests:
-        try:
-            results.append(test())
-        except Exception as e:
-            print(f"\n[ERROR] Test failed with exception: {e}")
-            results.append(False)
-    
-    print("\n" + "=" * 50)
-    print("Validation Summary")
-    print("=" * 50)
-    
-    passed = sum(results)
-    total = len(results)
-    
-    print(f"Passed: {passed}/{total}")
-    
-    if all(results):
-        print("\n[PASS] All requirements validated successfully!")
-        sys.exit(0)
-    else:
-        print("\n[FAIL] Some tests failed. Please review above.")
+    if importlib.util.find_spec("queuectl") is None:
+        print("\n[ERROR] queuectl command not found. Please install first:")
+        print("  pip install -e .")
         sys.exit(1)
+    
+    args = [__file__, "-q"]
+    # Spread tests over CPUs when pytest-xdist is installed
+    if importlib.util.find_spec("xdist") is not None:
+        args += ["-n", "auto"]
+    sys.exit(pytest.main(args))
 
 
 if __name__ == "__main__":